@@ -1,5 +1,5 @@
 # grainyhead - Helper tools for GitHub
-# Copyright © 2021,2023,2025 Damien Goutte-Gattat
+# Copyright © 2021,2023,2025,2026 Damien Goutte-Gattat
 #
 # This program is free software: you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -16,14 +16,26 @@
 
 from __future__ import annotations
 
+import gzip
+import hashlib
+import json
+import lzma
+import os
 import os.path
 import re
+import shutil
 import time
 from datetime import timedelta
-from typing import ClassVar, Optional
+from functools import partial
+from typing import IO, Any, Callable, ClassVar, Optional
 
 from click import ParamType
 
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None
+
 _durations = {"d": 1, "w": 7, "m": 30, "y": 365}
 _max_seconds = timedelta.max / timedelta(seconds=1)
 
@@ -204,3 +216,192 @@ CachePolicy.NO_REFRESH = CachePolicy(_max_seconds)
 CachePolicy.RESET = CachePolicy(-1)
 CachePolicy.DISABLED = CachePolicy(-2)
 CachePolicy.ClickType = CachePolicy.get_click_type()
+
+
+class PageCache(object):
+    """Stores pages of results from GitHub along with their validators.
+
+    The validators are the values of the ETag and Last-Modified headers
+    that GitHub sent along with a page. They allow to request that page
+    again conditionally: if the page has not changed since, GitHub
+    answers with a 304 status (which does not count against the rate
+    limit) and the stored copy of the page can be used instead.
+
+    Each page is stored as a JSON file in the cache directory, named
+    after a key computed from the parameters of the request, and
+    compressed with the method given at construction time.
+    """
+
+    def __init__(self, directory: str, compression: Optional[Compression] = None):
+        """Creates a new instance.
+
+        :param directory: the directory where to store the pages
+        :param compression: the compression method to use when storing
+            pages; the default is not to compress them
+        """
+
+        self._directory = directory
+        self._compression = compression or Compression.NONE
+
+    @staticmethod
+    def get_key(*components: Any) -> str:
+        """Computes a page key from the parameters of a request."""
+
+        key = json.dumps(components, sort_keys=True)
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """Gets a stored page.
+
+        :param key: the key of the page
+        :return: the stored page, or None if no page was stored under
+            that key
+        """
+
+        pathname = Compression.find_file(os.path.join(self._directory, key + ".json"))
+        if pathname is None:
+            return None
+        try:
+            with Compression.from_filename(pathname).open(pathname, "rt") as f:
+                return json.load(f)
+        except (ValueError, OSError, EOFError, lzma.LZMAError):
+            # Ignore a corrupted or unreadable page, it will be fetched
+            # again
+            return None
+
+    def put(self, key: str, page: dict[str, Any]) -> None:
+        """Stores a page.
+
+        :param key: the key of the page
+        :param page: the page to store, as a dictionary that must
+            contain at least the 'items' of the page and some
+            validators ('etag' and/or 'last_modified')
+        """
+
+        os.makedirs(self._directory, 0o755, True)
+        pathname = os.path.join(self._directory, key + ".json")
+        compressed_file = pathname + self._compression.extension
+        with self._compression.open(compressed_file + ".tmp", "wt") as f:
+            json.dump(page, f)
+        os.replace(compressed_file + ".tmp", compressed_file)
+
+        # Remove any copy written with another method
+        for c in Compression.all():
+            if c != self._compression and os.path.exists(pathname + c.extension):
+                os.remove(pathname + c.extension)
+
+    def clear(self) -> None:
+        """Removes all the stored pages."""
+
+        if os.path.exists(self._directory):
+            shutil.rmtree(self._directory)
+
+
+class Compression(object):
+    """Represents a compression method for cache files.
+
+    Use one of the static properties NONE, GZIP, LZMA, or ZSTD to get
+    a given method, or the static constructor from_string to get a
+    method from its name.
+
+    Files compressed with a given method are identified by the
+    extension appended to their name, so that the method used for a
+    given file can always be found (see from_filename and find_file),
+    regardless of the method currently selected for writing.
+    """
+
+    def __init__(self, name: str, extension: str, opener: Optional[Callable[..., IO]]):
+        """Creates a new instance.
+
+        :param name: the name of the method
+        :param extension: the extension of the files compressed with
+            that method
+        :param opener: the function to open a file compressed with
+            that method, or None if the method is not available
+        """
+
+        self.name = name
+        self.extension = extension
+        self._opener = opener
+
+    @property
+    def is_available(self) -> bool:
+        """Indicates whether this method can be used."""
+
+        return self._opener is not None
+
+    def open(self, pathname: str, mode: str = "rt") -> IO:
+        """Opens a file compressed with this method.
+
+        :param pathname: the path to the file, including the extension
+        :param mode: the mode, as for the builtin open() function
+        :return: a file object that transparently compresses what is
+            written to it, or decompresses what is read from it
+        """
+
+        if self._opener is None:
+            raise OSError(f"Compression method {self.name} is not available")
+        if "b" in mode:
+            return self._opener(pathname, mode)
+        return self._opener(pathname, mode, encoding="utf-8")
+
+    NONE: ClassVar[Compression]
+    GZIP: ClassVar[Compression]
+    LZMA: ClassVar[Compression]
+    ZSTD: ClassVar[Compression]
+
+    @classmethod
+    def all(cls) -> list[Compression]:
+        """Gets all the known methods."""
+
+        return [cls.NONE, cls.GZIP, cls.LZMA, cls.ZSTD]
+
+    @classmethod
+    def from_string(cls, value: str) -> Optional[Compression]:
+        """Gets a method from its name.
+
+        The value can be 'none', 'gzip', 'lzma' (or 'xz'), or 'zstd'.
+        Any other value will cause None to be returned.
+        """
+
+        value = value.lower()
+        if value == "xz":
+            value = "lzma"
+        return next((c for c in cls.all() if c.name == value), None)
+
+    @classmethod
+    def from_filename(cls, pathname: str) -> Compression:
+        """Gets the method used to compress the specified file."""
+
+        for c in cls.all()[1:]:
+            if pathname.endswith(c.extension):
+                return c
+        return cls.NONE
+
+    @classmethod
+    def find_file(cls, pathname: str) -> Optional[str]:
+        """Looks for a file, compressed with any method.
+
+        :param pathname: the path to the file, without the extension
+            added by the compression
+        :return: the path to the file that exists, or None if the file
+            does not exist under any method
+        """
+
+        for c in cls.all():
+            if os.path.exists(pathname + c.extension):
+                return pathname + c.extension
+        return None
+
+
+Compression.NONE = Compression("none", "", open)
+# The default level (9) is much slower for little gain on JSON data
+Compression.GZIP = Compression(
+    "gzip",
+    ".gz",
+    partial(gzip.open, compresslevel=6),  # type: ignore
+)
+Compression.LZMA = Compression("lzma", ".xz", lzma.open)
+Compression.ZSTD = Compression(
+    "zstd", ".zst", zstandard.open if zstandard is not None else None
+)
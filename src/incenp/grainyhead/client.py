@@ -0,0 +1,426 @@
+# grainyhead - Helper tools for GitHub
+# Copyright © 2026 Damien Goutte-Gattat
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import base64
+import gzip
+import json
+import logging
+import math
+import ssl
+import threading
+import time
+from http.client import HTTPConnection, HTTPException, HTTPMessage, HTTPSConnection
+from io import BytesIO
+from typing import Any, Callable, Optional
+from urllib.error import HTTPError
+from urllib.parse import SplitResult, quote, unquote, urlencode, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+from fastcore.net import ExceptionsHTTP, HTTP4xxClientError  # type: ignore
+from fastcore.xtras import dict2obj  # type: ignore
+from ghapi.core import GhApi  # type: ignore
+
+from . import __version__
+
+_MAX_REDIRECTS = 5
+_IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+
+class RequestScheduler(object):
+    """Schedules requests to the GitHub API according to the rate limit.
+
+    All requests should go through the run() method of a single
+    scheduler, which keeps track of the remaining request budget as
+    reported by GitHub in the X-RateLimit-* headers of each response.
+    The scheduler:
+
+    - limits the number of requests that are performed concurrently,
+      and reduces that number as the budget drains;
+    - suspends all requests until the budget is reset, when it is
+      exhausted;
+    - retries requests that have been rejected because of a primary or
+      secondary rate limit, after the delay indicated by GitHub or
+      after an exponentially increasing delay.
+    """
+
+    def __init__(
+        self, max_requests: int = 16, max_retries: int = 5, throttle: float = 0.2
+    ):
+        """Creates a new instance.
+
+        :param max_requests: the maximal number of requests that may be
+            performed concurrently
+        :param max_retries: the maximal number of times a request that
+            has been rejected because of a rate limit is retried
+        :param throttle: the fraction of the budget below which the
+            number of concurrent requests starts to be reduced
+        """
+
+        self.max_requests = max_requests
+        self._max_retries = max_retries
+        self._throttle = throttle
+        self._cond = threading.Condition()
+        self._active = 0
+        self._limit: Optional[int] = None
+        self._remaining: Optional[int] = None
+        self._reset = 0.0
+        self._announced_reset = 0.0
+
+    def run(self, request: Callable[[], Any], get_headers: Callable[[], Any]) -> Any:
+        """Performs a request.
+
+        :param request: the function that actually performs the request
+            and returns its result; it may be called several times if
+            the request needs to be retried
+        :param get_headers: a function that returns the headers of the
+            response to the last request performed by the calling
+            thread
+        :return: the result of the request
+        """
+
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                result = request()
+                self._update(get_headers())
+                return result
+            except HTTPError as e:
+                self._update(e.headers)
+                delay = self._get_retry_delay(e, attempt)
+                if delay is None or attempt >= self._max_retries:
+                    raise
+            finally:
+                self._release()
+
+            attempt += 1
+            logging.warning(
+                f"Request rejected because of a rate limit, retrying in {delay:.0f}s"
+            )
+            time.sleep(delay)
+
+    def _acquire(self) -> None:
+        with self._cond:
+            while True:
+                now = time.time()
+                if self._remaining is not None and self._reset <= now:
+                    # The budget has been reset since we last saw it
+                    self._remaining = None
+                if self._remaining is not None and self._remaining <= self._active:
+                    if self._announced_reset != self._reset:
+                        self._announced_reset = self._reset
+                        logging.warning(
+                            "Rate limit exhausted, waiting until "
+                            f"{time.strftime('%H:%M:%S', time.localtime(self._reset))}"
+                        )
+                    self._cond.wait(self._reset - now + 1)
+                elif self._active >= self._get_max_requests():
+                    self._cond.wait()
+                else:
+                    break
+            self._active += 1
+
+    def _release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _get_max_requests(self) -> int:
+        """Gets the number of concurrent requests allowed by the budget."""
+
+        if self._remaining is None or self._limit is None:
+            return self.max_requests
+        threshold = self._limit * self._throttle
+        if self._remaining >= threshold:
+            return self.max_requests
+        return max(1, math.ceil(self.max_requests * self._remaining / threshold))
+
+    def _update(self, headers: Any) -> None:
+        """Updates the budget from the headers of a response."""
+
+        if headers is None:
+            return
+        headers = {k.lower(): v for k, v in headers.items()}
+        if "x-ratelimit-remaining" not in headers:
+            return
+        with self._cond:
+            self._remaining = int(headers["x-ratelimit-remaining"])
+            self._limit = int(headers.get("x-ratelimit-limit", self._limit or 0))
+            self._reset = float(headers.get("x-ratelimit-reset", self._reset))
+            self._cond.notify_all()
+
+    def _get_retry_delay(self, error: HTTPError, attempt: int) -> Optional[float]:
+        """Gets the delay before retrying a rejected request.
+
+        :return: the number of seconds to wait before retrying, or None
+            if the request was not rejected because of a rate limit
+        """
+
+        if error.code not in (403, 429):
+            return None
+
+        if retry_after := error.headers.get("Retry-After"):
+            return float(retry_after)
+        if error.headers.get("X-RateLimit-Remaining") == "0":
+            return max(0.0, self._reset - time.time()) + 1
+        if error.code == 429 or "secondary rate limit" in str(error.msg).lower():
+            # GitHub recommends waiting at least one minute
+            return 60.0 * 2**attempt
+        return None
+
+
+class ConnectionPool(object):
+    """A pool of persistent HTTP connections.
+
+    Connections are kept open after a request (unless the server asked
+    to close them) and reused for the next requests to the same host,
+    saving a TCP and TLS handshake per request.
+
+    As with urllib, the proxies set in the environment (HTTP_PROXY,
+    HTTPS_PROXY, NO_PROXY) are honoured. HTTPS requests are tunnelled
+    through the proxy.
+    """
+
+    def __init__(self, size: int = 16):
+        """Creates a new instance.
+
+        :param size: the maximal number of idle connections to keep
+            open for each host; this should be the maximal number of
+            requests that may be performed concurrently
+        """
+
+        self._size = size
+        self._lock = threading.Lock()
+        self._idle: dict[tuple[str, str], list[HTTPConnection]] = {}
+        self._ssl_context = ssl.create_default_context()
+        self._proxies = getproxies()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        body: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+    ) -> tuple[int, str, HTTPMessage, bytes]:
+        """Performs a HTTP request.
+
+        :return: the status code, the reason phrase, the headers, and
+            the (raw) body of the response
+        """
+
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        proxy = self._get_proxy(key)
+        if proxy is not None and parts.scheme == "http":
+            # Plain HTTP requests are sent to the proxy as they are
+            target = url
+            headers = {**headers, **self._get_proxy_headers(proxy)}
+
+        while True:
+            conn, reused = self._get_connection(key)
+            conn.timeout = timeout
+            sent = False
+            try:
+                conn.request(method, target, body, headers)
+                sent = True
+                response = conn.getresponse()
+                payload = response.read()
+            except (HTTPException, ConnectionError):
+                conn.close()
+                # The server probably closed the idle connection, retry
+                # with another one, unless the server may have received
+                # (and acted upon) a non-idempotent request
+                if reused and (not sent or method in _IDEMPOTENT_METHODS):
+                    continue
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release_connection(key, conn)
+            return (response.status, response.reason, response.msg, payload)
+
+    def _get_connection(self, key: tuple[str, str]) -> tuple[HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return (idle.pop(), True)
+
+        scheme, netloc = key
+        if (proxy := self._get_proxy(key)) is not None:
+            # Without the credentials, if any
+            proxy_host = proxy.netloc.rpartition("@")[2]
+            if scheme == "https":
+                conn: HTTPConnection = HTTPSConnection(
+                    proxy_host, context=self._ssl_context
+                )
+                conn.set_tunnel(netloc, headers=self._get_proxy_headers(proxy))
+            else:
+                conn = HTTPConnection(proxy_host)
+            return (conn, False)
+
+        if scheme == "https":
+            return (HTTPSConnection(netloc, context=self._ssl_context), False)
+        return (HTTPConnection(netloc), False)
+
+    def _get_proxy(self, key: tuple[str, str]) -> Optional[SplitResult]:
+        """Gets the proxy to use to connect to a host, if any."""
+
+        scheme, netloc = key
+        proxy = self._proxies.get(scheme)
+        if not proxy or proxy_bypass(netloc):
+            return None
+        if "://" not in proxy:
+            proxy = "http://" + proxy
+        return urlsplit(proxy)
+
+    def _get_proxy_headers(self, proxy: SplitResult) -> dict[str, str]:
+        if proxy.username is None:
+            return {}
+        credentials = f"{unquote(proxy.username)}:{unquote(proxy.password or '')}"
+        token = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+        return {"Proxy-Authorization": f"Basic {token}"}
+
+    def _release_connection(self, key: tuple[str, str], conn: HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._size:
+                idle.append(conn)
+                return
+        conn.close()
+
+
+class GitHubClient(GhApi):
+    """A GitHub API client that can be shared between threads.
+
+    GhApi stores the headers of the last response it received in the
+    'recv_hdrs' attribute of the client object, where they would be
+    overwritten by any concurrent request. This class stores them in
+    thread-local storage instead, so that each thread always sees the
+    headers of the last response it received itself.
+
+    In addition, all requests go through a RequestScheduler, so that
+    the client can be used for long unattended runs without falling
+    foul of GitHub's rate limits; and they are sent over the persistent
+    connections of a ConnectionPool, asking for gzip-compressed
+    responses.
+    """
+
+    def __init__(
+        self,
+        *args,
+        scheduler: Optional[RequestScheduler] = None,
+        pool: Optional[ConnectionPool] = None,
+        **kwargs,
+    ):
+        self._local = threading.local()
+        self._scheduler = scheduler or RequestScheduler()
+        self._pool = pool or ConnectionPool(self._scheduler.max_requests)
+        GhApi.__init__(self, *args, **kwargs)
+        # GitHub rejects requests without a User-Agent
+        if not any(k.lower() == "user-agent" for k in self.headers):
+            self.headers["User-Agent"] = f"grainyhead/{__version__}"
+
+    @property
+    def recv_hdrs(self) -> Any:
+        return getattr(self._local, "recv_hdrs", {})
+
+    @recv_hdrs.setter
+    def recv_hdrs(self, headers: Any) -> None:
+        self._local.recv_hdrs = headers
+
+    def __call__(
+        self,
+        path: str,
+        verb: Optional[str] = None,
+        headers: Optional[dict] = None,
+        route: Optional[dict] = None,
+        query: Optional[dict] = None,
+        data: Any = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        verb = (verb or ("POST" if data else "GET")).upper()
+        headers = {**self.headers, **(headers or {}), "Accept-Encoding": "gzip"}
+        if not path.startswith(("http://", "https://")):
+            path = self.gh_host + path
+        if route:
+            path = path.format(**{k: quote(str(v), safe="") for k, v in route.items()})
+        if query:
+            path += "?" + urlencode(query)
+        body = None
+        if data and isinstance(data, dict):
+            body = json.dumps(data).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        elif data:
+            body = data
+
+        return self._scheduler.run(
+            lambda: self._request(verb, path, headers, body, timeout),
+            lambda: self.recv_hdrs,
+        )
+
+    def _request(
+        self,
+        verb: str,
+        url: str,
+        headers: dict[str, str],
+        body: Optional[bytes],
+        timeout: Optional[float],
+    ) -> Any:
+        for _ in range(_MAX_REDIRECTS):
+            status, reason, msg, payload = self._pool.request(
+                verb, url, headers, body, timeout
+            )
+            if status in (301, 302, 303, 307, 308) and "Location" in msg:
+                new_url = urljoin(url, msg["Location"])
+                if urlsplit(new_url).netloc != urlsplit(url).netloc:
+                    headers = {k: v for k, v in headers.items() if k != "Authorization"}
+                if status == 303:
+                    verb, body = "GET", None
+                url = new_url
+                continue
+            break
+
+        if msg.get("Content-Encoding") == "gzip":
+            payload = gzip.decompress(payload)
+        self.recv_hdrs = dict(msg)
+
+        if status >= 300:
+            text = payload.decode("utf-8", errors="ignore")
+            reason += f"\n====Error Body====\n{text}"
+            fp = BytesIO(payload)
+            if status in ExceptionsHTTP:
+                raise ExceptionsHTTP[status](url, msg, fp, msg=reason)
+            elif 400 <= status < 500:
+                raise HTTP4xxClientError(url, status, reason, msg, fp)
+            raise HTTPError(url, status, reason, msg, fp)
+
+        if "X-RateLimit-Remaining" in msg and self.limit_cb is not None:
+            remaining = msg["X-RateLimit-Remaining"]
+            if remaining != self.limit_rem:
+                self.limit_cb(int(remaining), int(msg["X-RateLimit-Limit"]))
+            self.limit_rem = remaining
+
+        content_type = msg.get("Content-Type", "")
+        if "json" in content_type:
+            return dict2obj(json.loads(payload)) if payload else None
+        elif content_type.startswith("text/"):
+            return payload.decode("utf-8")
+        return payload
@@ -15,9 +15,10 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional
 
-from .providers import RepositoryItem
+from .providers import ItemIndex, ItemRecord
+from .symbols import RepositorySymbols
 
 
 class ItemFilter(object):
@@ -39,6 +40,19 @@ class ItemFilter(object):
 
         return False
 
+    def get_candidates(self, _: ItemIndex) -> Optional[set[int]]:
+        """Gets the items that this filter may accept.
+
+        Derived classes may override this method to use the inverted
+        indexes of the items, so that only the returned items need to
+        be tested with the filter() method.
+
+        :return: the positions of the items in the index, or None if
+            any item may be accepted
+        """
+
+        return None
+
 
 class NullFilter(ItemFilter):
     """A null filter that accepts all items."""
@@ -68,12 +82,15 @@ class DateRangeFilter(ItemFilter):
 
         self._start = start
         self._end = end
+        # This filter is tested against every item by every selector
+        self._start_ts = start.timestamp()
+        self._end_ts = end.timestamp()
 
     def __str__(self) -> str:
         return f"date:{self._start:%Y-%m-%d}..{self._end:%Y-%m-%d}"
 
-    def filter(self, item: RepositoryItem) -> bool:
-        return item.created(after=self._start, before=self._end)
+    def filter(self, item: ItemRecord) -> bool:
+        return self._start_ts < item.creation_timestamp < self._end_ts
 
 
 class TeamFilter(ItemFilter):
@@ -83,15 +100,26 @@ class TeamFilter(ItemFilter):
     members of a given team.
     """
 
-    def __init__(self, team_name: str, members: list[str]):
+    def __init__(
+        self,
+        team_name: str,
+        members: list[str],
+        symbols: Optional[RepositorySymbols] = None,
+    ):
         """Creates a new instance.
 
         :param team_name: the name of the team (for display purposes)
         :param members: list of team members' name
+        :param symbols: if set, the symbol tables of the repository the
+            filtered items come from; the filter then compares user
+            identifiers rather than user names
         """
 
         self._slug = team_name
         self._members = members
+        self._ids = None
+        if symbols is not None:
+            self._ids = {symbols.users.intern(m) for m in members}
 
     def __str__(self) -> str:
         return f"team:{self._slug}"
@@ -100,15 +128,25 @@ class TeamFilter(ItemFilter):
     def name(self) -> str:
         return self._slug
 
-    def filter(self, item: RepositoryItem) -> bool:
+    def filter(self, item: ItemRecord) -> bool:
+        if self._ids is not None:
+            return item.user_id in self._ids
         return item.user_name in self._members
 
+    def get_candidates(self, index: ItemIndex) -> Optional[set[int]]:
+        if self._ids is None:
+            return None
+        return {n for i in self._ids for n in index.by_user(i)}
+
 
 class UserFilter(ItemFilter):
     """A filter that accepts items originating from a given user."""
 
-    def __init__(self, user_name: str):
+    def __init__(self, user_name: str, symbols: Optional[RepositorySymbols] = None):
         self._user = user_name
+        self._id = None
+        if symbols is not None:
+            self._id = symbols.users.intern(user_name)
 
     def __str__(self) -> str:
         return f"user:{self._user}"
@@ -117,15 +155,125 @@ class UserFilter(ItemFilter):
     def name(self) -> str:
         return f"@{self._user}"
 
-    def filter(self, item: RepositoryItem) -> bool:
+    def filter(self, item: ItemRecord) -> bool:
+        if self._id is not None:
+            return self._id == item.user_id
         return self._user == item.user_name
 
+    def get_candidates(self, index: ItemIndex) -> Optional[set[int]]:
+        if self._id is None:
+            return None
+        return set(index.by_user(self._id))
+
+
+class WildcardFilter(ItemFilter):
+    """Base class for filters that stand for a set of filters of the
+    same kind, one for each possible value of a given key.
+
+    Such a filter accepts the items accepted by any filter of the set,
+    and the get_keys() method tells which filters of the set accept a
+    given item. This allows to compute the results of all the filters
+    of the set in a single pass over the items (as a group-by on the
+    key), instead of one pass for each filter.
+
+    The filter can also be bound to a given key, in which case it
+    behaves as the filter of the set for that key.
+    """
+
+    def __init__(self, keys: list[str]):
+        """Creates a new instance.
+
+        :param keys: the keys of all the filters in the set
+        """
+
+        self._keys = keys
+        self._key: Optional[str] = None
+
+    @property
+    def keys(self) -> list[str]:
+        """The keys of all the filters in the set."""
+
+        return self._keys
+
+    def bind(self, key: Optional[str]) -> None:
+        """Binds the filter to a given key, or unbinds it if the key is
+        None."""
+
+        self._key = key
+
+    def get_keys(self, _: Any) -> list[str]:
+        """Gets the keys of the filters accepting the specified item,
+        among the items accepted by the unbound filter."""
+
+        return []
+
+
+class UserWildcardFilter(WildcardFilter):
+    """A filter that stands for a set of UserFilter filters.
+
+    This filter represents the 'user:*TEAM' selectors, which stand for
+    one 'user:USER' selector for each member of a given team. The key
+    is the name of the user.
+    """
+
+    def __init__(
+        self,
+        team_name: str,
+        members: list[str],
+        symbols: Optional[RepositorySymbols] = None,
+    ):
+        """Creates a new instance.
+
+        :param team_name: the name of the team (for display purposes)
+        :param members: list of team members' name
+        :param symbols: if set, the symbol tables of the repository the
+            filtered items come from; the filter then compares user
+            identifiers rather than user names
+        """
+
+        WildcardFilter.__init__(self, members)
+        self._slug = team_name
+        self._members = members
+        self._ids = None
+        if symbols is not None:
+            self._ids = {symbols.users.intern(m) for m in members}
+
+    def __str__(self) -> str:
+        if self._key is not None:
+            return f"user:{self._key}"
+        return f"user:*{self._slug}"
+
+    @property
+    def name(self) -> str:
+        if self._key is not None:
+            return f"@{self._key}"
+        return f"@*{self._slug}"
+
+    def filter(self, item: ItemRecord) -> bool:
+        if self._key is not None:
+            return self._key == item.user_name
+        if self._ids is not None:
+            return item.user_id in self._ids
+        return item.user_name in self._members
+
+    def get_candidates(self, index: ItemIndex) -> Optional[set[int]]:
+        if self._key is not None or self._ids is None:
+            return None
+        return {n for i in self._ids for n in index.by_user(i)}
+
+    def get_keys(self, item: ItemRecord) -> list[str]:
+        name = item.user_name
+        return [name] if name is not None else []
+
 
 class LabelFilter(ItemFilter):
     """A filter that accepts items carrying a given label."""
 
-    def __init__(self, label: str):
+    def __init__(self, label: str, symbols: Optional[RepositorySymbols] = None):
         self._label = label
+        self._mask = 0
+        if symbols is not None:
+            self._mask = 1 << symbols.labels.intern(label)
 
     def __str__(self) -> str:
         return f"label:{self._label}"
@@ -134,9 +282,77 @@ class LabelFilter(ItemFilter):
     def name(self) -> str:
         return self._label
 
-    def filter(self, item: RepositoryItem) -> bool:
+    def filter(self, item: ItemRecord) -> bool:
+        if self._mask:
+            return item.label_mask & self._mask != 0
         return self._label in item.label_strings
 
+    def get_candidates(self, index: ItemIndex) -> Optional[set[int]]:
+        if not self._mask:
+            return None
+        return set(index.by_label(self._mask.bit_length() - 1))
+
+
+class LabelWildcardFilter(WildcardFilter):
+    """A filter that stands for a set of LabelFilter filters.
+
+    This filter represents the 'label:*' selectors, which stand for one
+    'label:LABEL' selector for each label of the repository. The key is
+    the name of the label.
+    """
+
+    def __init__(self, labels: list[str], symbols: Optional[RepositorySymbols] = None):
+        """Creates a new instance.
+
+        :param labels: the names of all the labels
+        :param symbols: if set, the symbol tables of the repository the
+            filtered items come from; the filter then compares label
+            identifiers rather than label names
+        """
+
+        WildcardFilter.__init__(self, labels)
+        self._labels = set(labels)
+        self._symbols = symbols
+        self._mask = 0
+        if symbols is not None:
+            self._mask = symbols.labels.get_mask(labels)
+
+    def __str__(self) -> str:
+        if self._key is not None:
+            return f"label:{self._key}"
+        return "label:*"
+
+    @property
+    def name(self) -> str:
+        if self._key is not None:
+            return self._key
+        return "*"
+
+    def filter(self, item: ItemRecord) -> bool:
+        if self._key is not None:
+            return self._key in item.label_strings
+        if self._mask:
+            return item.label_mask & self._mask != 0
+        return not self._labels.isdisjoint(item.label_strings)
+
+    def get_candidates(self, index: ItemIndex) -> Optional[set[int]]:
+        if self._key is not None or not self._mask:
+            return None
+        candidates: set[int] = set()
+        mask = self._mask
+        label = 0
+        while mask:
+            if mask & 1:
+                candidates.update(index.by_label(label))
+            mask >>= 1
+            label += 1
+        return candidates
+
+    def get_keys(self, item: ItemRecord) -> list[str]:
+        if self._symbols is not None:
+            return self._symbols.labels.get_names(item.label_mask & self._mask)
+        return [l for l in item.label_strings if l in self._labels]
+
 
 class ComplementFilter(ItemFilter):
     """A filter that inverts another filter.
@@ -156,7 +372,7 @@ class ComplementFilter(ItemFilter):
     def name(self) -> str:
         return f"!{self._filter.name}"
 
-    def filter(self, item: RepositoryItem) -> bool:
+    def filter(self, item: ItemRecord) -> bool:
         return not self._filter.filter(item)
 
 
@@ -180,6 +396,16 @@ class CombinedFilter(ItemFilter):
     def name(self) -> str:
         return f" {self._op} ".join([f.name for f in self._filters])
 
+    def _get_union_candidates(self, index: ItemIndex) -> Optional[set[int]]:
+        """Gets the items that any of the combined filters may accept."""
+
+        candidates: set[int] = set()
+        for f in self._filters:
+            if (c := f.get_candidates(index)) is None:
+                return None
+            candidates |= c
+        return candidates
+
 
 class IntersectionFilter(CombinedFilter):
     """A filter that represents the intersection of a set of filters.
@@ -191,9 +417,16 @@ class IntersectionFilter(CombinedFilter):
     def __init__(self, filters: list[ItemFilter]):
         CombinedFilter.__init__(self, filters, "&")
 
-    def filter(self, item: RepositoryItem) -> bool:
+    def filter(self, item: ItemRecord) -> bool:
         return False not in [f.filter(item) for f in self._filters]
 
+    def get_candidates(self, index: ItemIndex) -> Optional[set[int]]:
+        candidates = None
+        for f in self._filters:
+            if (c := f.get_candidates(index)) is not None:
+                candidates = c if candidates is None else candidates & c
+        return candidates
+
 
 class UnionFilter(CombinedFilter):
     """A filter that represents the union of a set of filters.
@@ -205,9 +438,12 @@ class UnionFilter(CombinedFilter):
     def __init__(self, filters: list[ItemFilter]):
         CombinedFilter.__init__(self, filters, "|")
 
-    def filter(self, item: RepositoryItem) -> bool:
+    def filter(self, item: ItemRecord) -> bool:
         return True in [f.filter(item) for f in self._filters]
 
+    def get_candidates(self, index: ItemIndex) -> Optional[set[int]]:
+        return self._get_union_candidates(index)
+
 
 class DifferenceFilter(CombinedFilter):
     """A filter that represents the difference of a set of two filters.
@@ -219,5 +455,40 @@ class DifferenceFilter(CombinedFilter):
     def __init__(self, filters: list[ItemFilter]):
         CombinedFilter.__init__(self, filters, "^")
 
-    def filter(self, item: RepositoryItem) -> bool:
+    def filter(self, item: ItemRecord) -> bool:
         return len([r for r in [f.filter(item) for f in self._filters] if r]) == 1
+
+    def get_candidates(self, index: ItemIndex) -> Optional[set[int]]:
+        # Accepted items are accepted by one of the filters
+        return self._get_union_candidates(index)
+
+
+def get_group_wildcard(item_filter: ItemFilter) -> Optional[WildcardFilter]:
+    """Gets the wildcard filter to group the results of a filter by.
+
+    The results of a filter can be grouped by the key of a wildcard
+    filter if the wildcard is the only one in the filter, and if the
+    filter accepts an item only if the wildcard also accepts it (that
+    is, the wildcard is only combined with other filters through
+    intersections). The results for a given key are then those of the
+    filter with the wildcard bound to that key.
+
+    :param item_filter: the filter to inspect
+    :return: the wildcard filter, or None if the results of the filter
+        cannot be grouped
+    """
+
+    def find(f: ItemFilter, positive: bool) -> list[tuple[WildcardFilter, bool]]:
+        if isinstance(f, WildcardFilter):
+            return [(f, positive)]
+        elif isinstance(f, ComplementFilter):
+            return find(f._filter, False)
+        elif isinstance(f, CombinedFilter):
+            positive = positive and isinstance(f, IntersectionFilter)
+            return [w for inner in f._filters for w in find(inner, positive)]
+        return []
+
+    wildcards = find(item_filter, True)
+    if len(wildcards) == 1 and wildcards[0][1]:
+        return wildcards[0][0]
+    return None
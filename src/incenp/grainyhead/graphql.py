@@ -0,0 +1,479 @@
+# grainyhead - Helper tools for GitHub
+# Copyright © 2026 Damien Goutte-Gattat
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from fastcore.xtras import dict2obj  # type: ignore
+from ghapi.core import GhApi  # type: ignore
+
+from .providers import RepositoryItemType, RepositoryProvider, date2gh, gh2date
+
+_PAGE_INFO = "pageInfo { hasNextPage endCursor }"
+
+# The fields we need from an issue or a pull request, and from the
+# connections nested within them (name of the connection, additional
+# arguments, fields of each node)
+_ISSUE_FIELDS = "id databaseId number title url createdAt updatedAt closedAt"
+_ISSUE_CONNECTIONS = {
+    "Issue": [
+        ("labels", "", "name"),
+        ("assignees", "", "login url"),
+        ("comments", "", "databaseId createdAt updatedAt author { login }"),
+        (
+            "timelineItems",
+            ", itemTypes: [CLOSED_EVENT]",
+            "__typename ... on ClosedEvent { id createdAt actor { login } }",
+        ),
+    ],
+    "PullRequest": [
+        ("labels", "", "name"),
+        ("assignees", "", "login url"),
+        ("comments", "", "databaseId createdAt updatedAt author { login }"),
+        (
+            "timelineItems",
+            ", itemTypes: [CLOSED_EVENT, MERGED_EVENT]",
+            "__typename"
+            " ... on ClosedEvent { id createdAt actor { login } }"
+            " ... on MergedEvent { id createdAt actor { login } }",
+        ),
+    ],
+}
+_EVENT_NAMES = {"ClosedEvent": "closed", "MergedEvent": "merged"}
+_GHOST = {"login": "ghost"}
+
+
+class GraphQLError(Exception):
+    """An error reported by the GitHub GraphQL API."""
+
+    pass
+
+
+def _connection(name: str, args: str, fields: str, size: int = 100) -> str:
+    return (
+        f"{name}(first: {size}, after: $cursor{args}) "
+        f"{{ {_PAGE_INFO} nodes {{ {fields} }} }}"
+    )
+
+
+def _nested_connection(name: str, args: str, fields: str) -> str:
+    # Nested connections always start from their first page
+    return f"{name}(first: 100{args}) {{ {_PAGE_INFO} nodes {{ {fields} }} }}"
+
+
+def _git2gh(dtstr: str) -> str:
+    """Converts a Git timestamp into a GitHub date.
+
+    Contrary to other dates, Git timestamps are expressed in the UTC
+    offset of their author, whereas the rest of GrainyHead expects UTC
+    dates (which are compared as strings).
+    """
+
+    return date2gh(datetime.fromisoformat(dtstr.replace("Z", "+00:00")))
+
+
+class GraphQLRepositoryProvider(RepositoryProvider):
+    """Provides direct access to the data from a GitHub repository,
+    through the GraphQL API.
+
+    Contrary to the REST API used by OnlineRepositoryProvider, the
+    GraphQL API allows to request only the fields that GrainyHead
+    actually uses, and to get issues together with their comments and
+    their closing events in a single query. Items are returned in the
+    same shape as the items obtained from the REST API.
+    """
+
+    def __init__(self, api: GhApi, owner: str, repo: str, endpoint: str = "/graphql"):
+        """Creates a new instance.
+
+        :param api: the ghapi.core.GhApi object used to send the queries
+        :param owner: the owner of the repository
+        :param repo: the name of the repository
+        :param endpoint: the path to the GraphQL endpoint, relative to
+            the API host of the GhApi object
+        """
+
+        self._api = api
+        self._owner = owner
+        self._repo = repo
+        self._endpoint = endpoint
+        self._lock = threading.Lock()
+        self._crawls: list[tuple[Optional[datetime], dict[RepositoryItemType, Any]]]
+        self._crawls = []
+
+    def get_data(
+        self, item_type: RepositoryItemType, since: Optional[datetime] = None
+    ) -> Any:
+        if item_type in [
+            RepositoryItemType.ISSUES,
+            RepositoryItemType.EVENTS,
+            RepositoryItemType.COMMENTS,
+        ]:
+            data = self._get_issues_data(since)[item_type]
+        elif item_type == RepositoryItemType.COMMITS:
+            data = self._fetch_commits(since)
+        elif item_type == RepositoryItemType.RELEASES:
+            data = self._fetch_releases(since)
+        elif item_type == RepositoryItemType.LABELS:
+            data = self._fetch_labels()
+        elif item_type == RepositoryItemType.TEAMS:
+            data = self._fetch_teams()
+        elif item_type == RepositoryItemType.COMMITTERS:
+            data = self._fetch_committers()
+        return self._add_timestamps(item_type, dict2obj(data))
+
+    def _get_issues_data(
+        self, since: Optional[datetime]
+    ) -> dict[RepositoryItemType, list[dict]]:
+        """Gets issues, events, and comments.
+
+        Those three types of data are obtained from a single walk
+        through all issues and pull requests (updated after 'since', if
+        specified). The results are kept, so that a subsequent request
+        for another type of data covering the same period does not
+        cause a second walk.
+        """
+
+        with self._lock:
+            for crawl_since, crawl in self._crawls:
+                if crawl_since is None or (since is not None and crawl_since <= since):
+                    return self._filter_issues_data(crawl, since)
+
+            crawl = self._crawl_issues(since)
+            self._crawls.append((since, crawl))
+            return crawl
+
+    def _filter_issues_data(
+        self, crawl: dict[RepositoryItemType, list[dict]], since: Optional[datetime]
+    ) -> dict[RepositoryItemType, list[dict]]:
+        if since is None:
+            return crawl
+        return {
+            RepositoryItemType.ISSUES: [
+                i
+                for i in crawl[RepositoryItemType.ISSUES]
+                if gh2date(i["updated_at"]) >= since
+            ],
+            RepositoryItemType.EVENTS: [
+                e
+                for e in crawl[RepositoryItemType.EVENTS]
+                if gh2date(e["created_at"]) >= since
+            ],
+            RepositoryItemType.COMMENTS: [
+                c
+                for c in crawl[RepositoryItemType.COMMENTS]
+                if gh2date(c["created_at"]) >= since
+            ],
+        }
+
+    def _crawl_issues(
+        self, since: Optional[datetime]
+    ) -> dict[RepositoryItemType, list[dict]]:
+        issues = []
+        events = []
+        comments = []
+
+        def updated_before_since(node: Any) -> bool:
+            return since is not None and gh2date(node["updatedAt"]) < since
+
+        order = "CREATED_AT" if since is None else "UPDATED_AT"
+
+        for connection, typename in [
+            ("issues", "Issue"),
+            ("pullRequests", "PullRequest"),
+        ]:
+            nested = " ".join(
+                [_nested_connection(*c) for c in _ISSUE_CONNECTIONS[typename]]
+            )
+            query = (
+                "query($owner: String!, $name: String!, $cursor: String) {"
+                " repository(owner: $owner, name: $name) {"
+                + _connection(
+                    connection,
+                    f", orderBy: {{field: {order}, direction: DESC}}",
+                    f"{_ISSUE_FIELDS} author {{ login url }} {nested}",
+                    size=50,
+                )
+                + " } }"
+            )
+            for node in self._paginate(
+                query, ["repository", connection], stop=updated_before_since
+            ):
+                issue = self._convert_issue(node, typename)
+                issues.append(issue)
+                for comment in self._get_nodes(node, typename, "comments"):
+                    comments.append(
+                        {
+                            "id": comment["databaseId"],
+                            "created_at": comment["createdAt"],
+                            "updated_at": comment["updatedAt"],
+                            "user": comment["author"] or _GHOST,
+                        }
+                    )
+                for event in self._get_nodes(node, typename, "timelineItems"):
+                    if event["__typename"] not in _EVENT_NAMES:
+                        continue
+                    events.append(
+                        {
+                            "id": event["id"],
+                            "event": _EVENT_NAMES[event["__typename"]],
+                            "created_at": event["createdAt"],
+                            "actor": event["actor"],
+                            "issue": issue,
+                        }
+                    )
+
+        # Same order as the one used by the REST API
+        issues.sort(key=lambda i: i["created_at"], reverse=True)
+        events.sort(key=lambda e: e["created_at"], reverse=True)
+        comments.sort(key=lambda c: c["created_at"], reverse=True)
+
+        return {
+            RepositoryItemType.ISSUES: issues,
+            RepositoryItemType.EVENTS: events,
+            RepositoryItemType.COMMENTS: comments,
+        }
+
+    def _convert_issue(self, node: Any, typename: str) -> dict:
+        issue = {
+            "id": node["databaseId"],
+            "number": node["number"],
+            "title": node["title"],
+            "html_url": node["url"],
+            "created_at": node["createdAt"],
+            "updated_at": node["updatedAt"],
+            "closed_at": node["closedAt"],
+            "state": "open" if node["closedAt"] is None else "closed",
+            "user": node["author"] or _GHOST,
+            "labels": list(self._get_nodes(node, typename, "labels")),
+            "assignees": list(self._get_nodes(node, typename, "assignees")),
+        }
+        if typename == "PullRequest":
+            issue["pull_request"] = {"html_url": node["url"]}
+        return issue
+
+    def _fetch_commits(self, since: Optional[datetime]) -> list[dict]:
+        args = ""
+        if since is not None:
+            args = f', since: "{date2gh(since)}"'
+        query = (
+            "query($owner: String!, $name: String!, $cursor: String) {"
+            " repository(owner: $owner, name: $name) {"
+            " defaultBranchRef { target { ... on Commit {"
+            + _connection(
+                "history",
+                args,
+                "oid author { name date user { login } }",
+            )
+            + " } } } } }"
+        )
+        commits = []
+        path = ["repository", "defaultBranchRef", "target", "history"]
+        for node in self._paginate(query, path):
+            author = node["author"]
+            commits.append(
+                {
+                    "sha": node["oid"],
+                    "commit": {
+                        "author": {
+                            "name": author["name"],
+                            "date": _git2gh(author["date"]),
+                        }
+                    },
+                    "author": author["user"],
+                }
+            )
+        return commits
+
+    def _fetch_committers(self) -> list[dict]:
+        # There is no GraphQL equivalent to the REST 'contributors'
+        # endpoint, so we derive the list from the commit history
+        contributions: dict[str, int] = {}
+        for commit in self._fetch_commits(None):
+            if commit["author"] is not None:
+                login = commit["author"]["login"]
+                contributions[login] = contributions.get(login, 0) + 1
+        return [
+            {"login": login, "contributions": n}
+            for login, n in sorted(
+                contributions.items(), key=lambda c: c[1], reverse=True
+            )
+        ]
+
+    def _fetch_releases(self, since: Optional[datetime]) -> list[dict]:
+        query = (
+            "query($owner: String!, $name: String!, $cursor: String) {"
+            " repository(owner: $owner, name: $name) {"
+            + _connection(
+                "releases",
+                ", orderBy: {field: CREATED_AT, direction: DESC}",
+                "databaseId name tagName createdAt author { login }",
+            )
+            + " } }"
+        )
+
+        def created_before_since(node: Any) -> bool:
+            return since is not None and gh2date(node["createdAt"]) < since
+
+        return [
+            {
+                "id": node["databaseId"],
+                "name": node["name"],
+                "tag_name": node["tagName"],
+                "created_at": node["createdAt"],
+                "author": node["author"],
+            }
+            for node in self._paginate(
+                query, ["repository", "releases"], stop=created_before_since
+            )
+        ]
+
+    def _fetch_labels(self) -> list[dict]:
+        query = (
+            "query($owner: String!, $name: String!, $cursor: String) {"
+            " repository(owner: $owner, name: $name) {"
+            + _connection("labels", "", "id name color description")
+            + " } }"
+        )
+        return list(self._paginate(query, ["repository", "labels"]))
+
+    def _fetch_teams(self) -> list[dict]:
+        teams = []
+        query = (
+            "query($owner: String!, $name: String!, $cursor: String) {"
+            " repository(owner: $owner, name: $name) {"
+            + _connection("collaborators", "", "login")
+            + " } }"
+        )
+        try:
+            members = list(self._paginate(query, ["repository", "collaborators"]))
+        except GraphQLError:
+            logging.warning(
+                "Cannot get team members (possibly due to insufficient access rights)"
+            )
+            members = []
+        teams.append({"slug": "__collaborators", "members": members})
+
+        query = (
+            "query($owner: String!, $cursor: String) {"
+            " organization(login: $owner) {"
+            + _connection(
+                "teams", "", "id slug " + _nested_connection("members", "", "login")
+            )
+            + " } }"
+        )
+        try:
+            for node in self._paginate(query, ["organization", "teams"]):
+                members = list(self._get_nodes(node, "Team", "members", "", "login"))
+                teams.append({"slug": node["slug"], "members": members})
+        except GraphQLError:
+            logging.warning(
+                "Cannot get teams list (possibly due to insufficient access rights)"
+            )
+
+        return teams
+
+    def _get_nodes(
+        self,
+        node: Any,
+        typename: str,
+        name: str,
+        args: Optional[str] = None,
+        fields: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """Gets all the nodes of a connection nested within a node.
+
+        The first page of the connection is expected to have been
+        obtained along with the node itself; the remaining pages, if
+        any, are fetched with additional queries.
+        """
+
+        connection = node[name]
+        yield from connection["nodes"]
+        if not connection["pageInfo"]["hasNextPage"]:
+            return
+
+        if args is None or fields is None:
+            _, args, fields = next(
+                c for c in _ISSUE_CONNECTIONS[typename] if c[0] == name
+            )
+        query = (
+            "query($id: ID!, $cursor: String) {"
+            f" node(id: $id) {{ ... on {typename} {{"
+            + _connection(name, args, fields)
+            + " } } }"
+        )
+        yield from self._paginate(
+            query,
+            ["node", name],
+            variables={"id": node["id"]},
+            cursor=connection["pageInfo"]["endCursor"],
+        )
+
+    def _paginate(
+        self,
+        query: str,
+        path: list[str],
+        variables: Optional[dict[str, Any]] = None,
+        cursor: Optional[str] = None,
+        stop: Optional[Callable[[Any], bool]] = None,
+    ) -> Iterator[Any]:
+        """Iterates over all the nodes of a paginated connection.
+
+        :param query: the GraphQL query, which must accept a 'cursor'
+            variable
+        :param path: the path to the connection in the query results
+        :param variables: the variables of the query, other than the
+            cursor; the default is to pass the owner and name of the
+            repository
+        :param cursor: the cursor to start from
+        :param stop: a function called on each node, that should
+            return True to stop the iteration
+        """
+
+        if variables is None:
+            variables = {"owner": self._owner, "name": self._repo}
+            if "$name" not in query:
+                del variables["name"]
+
+        while True:
+            connection = self._query(query, {**variables, "cursor": cursor})
+            for component in path:
+                if connection is None:
+                    return
+                connection = connection[component]
+            if connection is None:
+                return
+
+            for node in connection["nodes"]:
+                if stop is not None and stop(node):
+                    return
+                yield node
+
+            if not connection["pageInfo"]["hasNextPage"]:
+                return
+            cursor = connection["pageInfo"]["endCursor"]
+
+    def _query(self, query: str, variables: dict[str, Any]) -> Any:
+        response = self._api(
+            self._endpoint, "POST", data={"query": query, "variables": variables}
+        )
+        if response.get("errors"):
+            raise GraphQLError("; ".join([e["message"] for e in response["errors"]]))
+        return response["data"]
@@ -26,14 +26,22 @@ from typing import Any, Optional
 
 import click
 from click_shell import shell
-from ghapi.core import GhApi  # type: ignore
 from pyparsing import ParseException
 
 from . import __version__
-from .caching import CachePolicy
+from .caching import CachePolicy, Compression, PageCache
+from .client import GitHubClient
+from .graphql import GraphQLRepositoryProvider
 from .metrics import MetricsFormatter, MetricsReporter
-from .providers import FileRepositoryProvider, OnlineRepositoryProvider
-from .repository import IssueItem, Repository
+from .providers import (
+    DEFAULT_FIELDS,
+    FileRepositoryProvider,
+    OnlineRepositoryProvider,
+    RepositoryItemType,
+    RepositoryProvider,
+)
+from .repository import IssueRecord, Repository
+from .sqlite import SqliteRepositoryProvider
 from .util import Date, Interval
 
 prog_name = "grh"
@@ -103,10 +111,35 @@ class GrhContext(object):
             repo_url = self._config.get(self._name, "repository")
             owner, repo = _parse_github_url(repo_url)
             token = self._config.get(self._name, "token", fallback=None)
-            api = GhApi(owner=owner, repo=repo, org=owner, token=token)
-            backend = FileRepositoryProvider(
-                self.cache_dir, OnlineRepositoryProvider(api), self.cache_policy
-            )
+            api = GitHubClient(owner=owner, repo=repo, org=owner, token=token)
+            workers = int(self.get_option("fetch.workers", "1"))
+            teams = None
+            if team_list := self.get_option("fetch.teams"):
+                teams = re.split("[,\\s]+", team_list.strip())
+            fields = self.fields
+            page_cache = None
+            if self.cache_policy != CachePolicy.DISABLED:
+                page_cache = PageCache(
+                    os.path.join(self.cache_dir, "pages"), self.cache_compression
+                )
+                if self.cache_policy == CachePolicy.RESET:
+                    page_cache.clear()
+            online: RepositoryProvider
+            if self.get_option("fetch.api", "rest") == "graphql":
+                online = GraphQLRepositoryProvider(api, owner, repo)
+            else:
+                online = OnlineRepositoryProvider(
+                    api, workers, teams, page_cache, fields
+                )
+            backend: RepositoryProvider
+            if self.get_option("caching.backend", "json") == "sqlite":
+                backend = SqliteRepositoryProvider(
+                    os.path.join(self.cache_dir, "cache.db"), online, self.cache_policy
+                )
+            else:
+                backend = FileRepositoryProvider(
+                    self.cache_dir, online, self.cache_policy, self.cache_compression
+                )
             self._repo = Repository(api, backend)
         return self._repo
 
@@ -137,6 +170,33 @@ class GrhContext(object):
     def cache_policy(self, policy: CachePolicy) -> None:
         self._cache_policy = policy
 
+    @property
+    def cache_compression(self) -> Compression:
+        c = Compression.from_string(self.get_option("caching.compression", "none"))
+        if c is None:
+            die("Invalid cache compression method")
+            assert False
+        if not c.is_available:
+            die(f"Cache compression method {c.name} is not available")
+            assert False
+        return c
+
+    @property
+    def fields(self) -> Optional[dict[RepositoryItemType, dict[str, Any]]]:
+        """The fields to keep in the items fetched from GitHub."""
+
+        mode = self.get_option("fetch.fields", "minimal")
+        if mode == "raw":
+            return None
+        elif mode != "minimal":
+            die("Invalid value for fetch.fields")
+
+        fields = {t: dict(f) for t, f in DEFAULT_FIELDS.items()}
+        for t in RepositoryItemType:
+            if extra := self.get_option(f"fetch.fields.{t.name.lower()}"):
+                fields[t].update({f: None for f in re.split("[,\\s]+", extra.strip())})
+        return fields
+
     @property
     def cache_dir(self) -> str:
         xdg_data_dir = os.getenv(
@@ -210,14 +270,14 @@ def list_issues(grh: GrhContext, cutoff: datetime, team: str) -> None:
     """
 
     repo = grh.repository
-
-    issues = [i for i in repo.issues if i.updated(before=cutoff)]
     members = [m.login for m in repo.get_team(team)]
 
     print("| Issue | Author | Team? | Assignee(s) |")
     print("| ----- | ------ | ----- | ----------- |")
 
-    for issue in issues:
+    for issue in repo.iter_issues():
+        if not issue.updated(before=cutoff):
+            continue
         assignees = ", ".join(
             ["@[{}]({})".format(a.login, a.html_url) for a in issue.assignees]
         )
@@ -264,6 +324,7 @@ def auto_close(
     """
 
     repo = grh.repository
+    repo.prefetch([RepositoryItemType.ISSUES, RepositoryItemType.LABELS])
 
     repo.create_label(
         "autoclosed-unfixed", "ff7000", "This issue has been closed automatically."
@@ -295,14 +356,14 @@ def auto_close(
             sleep(randint(2, 10))
 
 
-def _list_closable_issues(issues: list[IssueItem]) -> Generator[str]:
+def _list_closable_issues(issues: list[IssueRecord]) -> Generator[str]:
     yield f"The following {len(issues)} issues are about to be closed:\n"
     for issue in issues:
         last_update, _ = issue.updated_at.split("T")
         yield f"{issue.number}: last update {last_update}: {issue.title}\n"
 
 
-def _show_closing_issue(issue: Optional[IssueItem] = None) -> str:
+def _show_closing_issue(issue: Optional[IssueRecord] = None) -> str:
     if issue:
         return f"Closing issue #{issue.number}"
     else:
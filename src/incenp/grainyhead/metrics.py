@@ -17,6 +17,8 @@
 from __future__ import annotations
 
 import json
+from bisect import bisect_left
+from collections.abc import Iterable
 from datetime import datetime, timedelta
 from typing import Any, Optional, TextIO, Union
 
@@ -29,11 +31,15 @@ from .filtering import (
     IntersectionFilter,
     ItemFilter,
     LabelFilter,
+    LabelWildcardFilter,
     NullFilter,
     TeamFilter,
     UnionFilter,
     UserFilter,
+    UserWildcardFilter,
+    get_group_wildcard,
 )
+from .providers import ItemIndex, RepositoryItemType
 from .repository import Repository
 
 
@@ -50,6 +56,7 @@ class MetricsReporter(object):
 
         self._repo = repository
         self._selector_parser = None
+        self._indexes: Optional[dict[RepositoryItemType, ItemIndex]] = None
 
     def get_report(
         self,
@@ -58,104 +65,245 @@ class MetricsReporter(object):
         end: datetime,
         period: Optional[timedelta] = None,
     ) -> Union[list[_MetricsReportSet], _MetricsReportSet]:
-        selectors = self._expand_wildcard_selectors(selectors)
+        # Only load the items created during the reporting period (the
+        # last period may extend beyond the end date)
+        self._repo.prefetch(
+            self._get_required_types(selectors), start, end if period is None else None
+        )
 
         if period is None:
-            return self._get_report_for_period(selectors, start, end)
+            return self._get_reports_for_periods(selectors, [(start, end)])[0]
         else:
             done = False
-            reports = []
+            periods = []
 
             while not done:
                 period_end = start + period - timedelta(days=1)
-                reports.append(
-                    self._get_report_for_period(selectors, start, period_end)
-                )
+                periods.append((start, period_end))
 
                 if period_end > end:
                     done = True
                 else:
                     start = start + period
 
-            return reports
+            return self._get_reports_for_periods(selectors, periods)
+
+    def _get_reports_for_periods(
+        self, selectors: list[str], periods: list[tuple[datetime, datetime]]
+    ) -> list[_MetricsReportSet]:
+        # The selectors are parsed, and the items are scanned, only once
+        # for all the periods
+        self._date_filter = DateRangeFilter(periods[0][0], periods[-1][1])
+        self._indexes = self._get_indexes(periods[0][0], periods[-1][1])
+
+        item_filters = self._get_filters(selectors)
+        rsets = []
+        for (start, end), reports in zip(
+            periods, self._get_periodic_reports(item_filters, periods)
+        ):
+            rset = _MetricsReportSet(start, end)
+            for report in reports:
+                if report.name.startswith("@") and report.all_contributions == 0:
+                    # Exclude reports for users with no contributions at all
+                    continue
+                rset.contributions.append(report)
+            rsets.append(rset)
 
-    def _get_report_for_period(
-        self, selectors: list[str], start: datetime, end: datetime
-    ) -> _MetricsReportSet:
-        rset = _MetricsReportSet(start, end)
-        self._date_filter = DateRangeFilter(start, end)
+        self._indexes = None
+        return rsets
 
-        for selector in selectors:
-            item_filter = self._get_filter_from_selector(selector)
-            report = self.get_single_report(item_filter)
-            if report.name.startswith("@") and report.all_contributions == 0:
-                # Exclude reports for users with no contributions at all
-                continue
-            rset.contributions.append(report)
+    def _get_indexes(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> dict[RepositoryItemType, ItemIndex]:
+        """Gets the indexes of the items created during a given period.
 
-        return rset
+        The indexes may include items created outside of that period.
+        """
+
+        return {
+            t: self._repo.get_index(t, start, end)
+            for t in [
+                RepositoryItemType.ISSUES,
+                RepositoryItemType.EVENTS,
+                RepositoryItemType.COMMENTS,
+                RepositoryItemType.COMMITS,
+                RepositoryItemType.RELEASES,
+            ]
+        }
 
     def get_single_report(self, item_filter: ItemFilter) -> _Report:
         """Get a single report object based on the given filter."""
 
-        issues_opened = [i for i in self._repo.all_issues if item_filter.filter(i)]
-        issues_closes = [
-            e
-            for e in self._repo.events
-            if e.event == "closed"
-            and not hasattr(e.issue, "pull_request")
-            and item_filter.filter(e)
-        ]
+        return self.get_reports([item_filter])[0]
 
-        pulls_opened = [
-            p for p in self._repo.all_pull_requests if item_filter.filter(p)
-        ]
-        pulls_closes = [
-            e
-            for e in self._repo.events
-            if e.event == "closed"
-            and hasattr(e.issue, "pull_request")
-            and item_filter.filter(e)
+    def get_reports(self, item_filters: list[ItemFilter]) -> list[_Report]:
+        """Get report objects based on several filters at once.
+
+        Each item is classified only once, and then tested against all
+        the filters that may accept it.
+        """
+
+        return self._get_periodic_reports(item_filters, None)[0]
+
+    def _get_periodic_reports(
+        self,
+        item_filters: list[ItemFilter],
+        periods: Optional[list[tuple[datetime, datetime]]],
+    ) -> list[list[_Report]]:
+        """Get report objects based on several filters, for several
+        periods at once.
+
+        :param item_filters: the filters to get reports for
+        :param periods: the (start, end) times of the periods, in
+            chronological order; if None, there is a single period
+            that includes all the items
+        :return: the reports for each period, in the order of the
+            periods and then in the order of the filters; a filter with
+            a wildcard yields one report for each key of the wildcard
+        """
+
+        indexes = self._indexes or self._get_indexes()
+        n_periods = len(periods) if periods is not None else 1
+        # The results of filters with a wildcard are grouped by the key
+        # of the wildcard, those of other filters are under a None key
+        wildcards = [get_group_wildcard(f) for f in item_filters]
+        values: list[list[dict[Optional[str], list[int]]]] = [
+            [{} for _ in item_filters] for _ in range(n_periods)
         ]
-        pulls_merged = [
-            e
-            for e in self._repo.events
-            if e.event == "merged" and item_filter.filter(e)
+        contributors: list[list[dict[Optional[str], set[str]]]] = [
+            [{} for _ in item_filters] for _ in range(n_periods)
         ]
 
-        comments = [c for c in self._repo.comments if item_filter.filter(c)]
+        if periods is not None:
+            starts = [start.timestamp() for start, _ in periods]
+            ends = [end.timestamp() for _, end in periods]
+
+        def get_period(item: Any) -> Optional[int]:
+            if periods is None:
+                return 0
+            # Last period starting before the item, if the item was
+            # created before the end of that period
+            ts = item.creation_timestamp
+            n = bisect_left(starts, ts) - 1
+            if n < 0 or ts >= ends[n]:
+                return None
+            return n
+
+        for item_type, index in indexes.items():
+            items = index.items
+            positions: Iterable[int] = range(len(items))
+            if item_type == RepositoryItemType.EVENTS:
+                # Only closing and merging events are counted
+                positions = index.by_event("closed") + index.by_event("merged")
+
+            classified: dict[int, tuple[int, int, Optional[str]]] = {}
+            for pos in positions:
+                if (n := get_period(items[pos])) is not None:
+                    classified[pos] = (n, *self._classify(item_type, items[pos]))
+
+            for i, (item_filter, wildcard) in enumerate(zip(item_filters, wildcards)):
+                # Only test the items that the filter may accept
+                selected: Iterable[int] = classified
+                if (candidates := item_filter.get_candidates(index)) is not None:
+                    selected = candidates & classified.keys()
+
+                for pos in selected:
+                    item = items[pos]
+                    if not item_filter.filter(item):
+                        continue
+                    n, metric, contributor = classified[pos]
+                    report_values = values[n][i]
+                    report_contributors = contributors[n][i]
+                    for key in wildcard.get_keys(item) if wildcard else [None]:
+                        if (v := report_values.get(key)) is None:
+                            v = report_values[key] = [0] * 8
+                            report_contributors[key] = set()
+                        v[metric] += 1
+                        if contributor is not None:
+                            report_contributors[key].add(contributor)
+
+        return [
+            self._make_reports(
+                list(zip(item_filters, wildcards, values[n], contributors[n]))
+            )
+            for n in range(n_periods)
+        ]
 
-        commits = [c for c in self._repo.commits if item_filter.filter(c)]
+    @staticmethod
+    def _classify(
+        item_type: RepositoryItemType, item: Any
+    ) -> tuple[int, Optional[str]]:
+        """Gets what a counted item counts as.
 
-        releases = [r for r in self._repo.releases if item_filter.filter(r)]
+        :return: the index of the value to increment in the reports,
+            and the contributor to count, if any
+        """
 
-        _contributors = []
-        _contributors.extend([i.user.login for i in issues_opened])
-        _contributors.extend([p.user.login for p in pulls_opened])
-        _contributors.extend([c.user.login for c in comments])
-        _contributors.extend(
-            [e.actor.login for e in issues_closes if e.actor is not None]
-        )
-        _contributors.extend(
-            [e.actor.login for e in pulls_closes if e.actor is not None]
-        )
-        contributors = set(_contributors)
-
-        return _Report(
-            str(item_filter),
-            item_filter.name,
-            [
-                len(issues_opened),
-                len(issues_closes),
-                len(pulls_opened),
-                len(pulls_closes),
-                len(pulls_merged),
-                len(comments),
-                len(commits),
-                len(releases),
-                len(contributors),
-            ],
-        )
+        if item_type == RepositoryItemType.ISSUES:
+            return 2 if hasattr(item, "pull_request") else 0, item.user.login
+        elif item_type == RepositoryItemType.EVENTS:
+            if item.event == "merged":
+                return 4, None
+            actor = item.actor.login if item.actor is not None else None
+            return 3 if hasattr(item.issue, "pull_request") else 1, actor
+        elif item_type == RepositoryItemType.COMMENTS:
+            return 5, item.user.login
+        elif item_type == RepositoryItemType.COMMITS:
+            return 6, None
+        else:
+            return 7, None
+
+    def _make_reports(self, results: list[tuple]) -> list[_Report]:
+        reports = []
+        for item_filter, wildcard, values, contributors in results:
+            keys = wildcard.keys if wildcard else [None]
+            for key in keys:
+                if wildcard:
+                    wildcard.bind(key)
+                reports.append(
+                    _Report(
+                        str(item_filter),
+                        item_filter.name,
+                        values.get(key, [0] * 8) + [len(contributors.get(key, ()))],
+                    )
+                )
+            if wildcard:
+                wildcard.bind(None)
+        return reports
+
+    def _get_required_types(self, selectors: list[str]) -> list[RepositoryItemType]:
+        types = [
+            RepositoryItemType.ISSUES,
+            RepositoryItemType.EVENTS,
+            RepositoryItemType.COMMENTS,
+            RepositoryItemType.COMMITS,
+            RepositoryItemType.RELEASES,
+        ]
+        if True in ["team:" in s or "user:*" in s for s in selectors]:
+            types.append(RepositoryItemType.TEAMS)
+        if True in ["user:*" in s for s in selectors]:
+            types.append(RepositoryItemType.COMMITTERS)
+        if True in ["label:*" in s for s in selectors]:
+            types.append(RepositoryItemType.LABELS)
+        return types
+
+    def _get_filters(self, selectors: list[str]) -> list[ItemFilter]:
+        filters = []
+        for selector in selectors:
+            if "user:*" in selector or "label:*" in selector:
+                # Keep the wildcard if the results can be grouped by it,
+                # otherwise expand it into as many selectors as needed
+                item_filter = self._get_filter_from_selector(selector)
+                if get_group_wildcard(item_filter) is not None:
+                    filters.append(item_filter)
+                    continue
+            filters.extend(
+                [
+                    self._get_filter_from_selector(s)
+                    for s in self._expand_wildcard_selectors([selector])
+                ]
+            )
+        return filters
 
     def _expand_wildcard_selectors(self, selectors: list[str]) -> list[str]:
         if True not in ["*" in s for s in selectors]:
@@ -197,22 +345,39 @@ class MetricsReporter(object):
             team_filter = (
                 (pp.Literal("team:") + filter_value)
                 .set_parse_action(
-                    lambda t: TeamFilter(t[1], self._repo.get_usernames(t[1]))
+                    lambda t: TeamFilter(
+                        t[1], self._repo.get_usernames(t[1]), self._repo.symbols
+                    )
                 )
                 .leave_whitespace()
             )
+            user_wildcard_filter = (
+                (pp.Literal("user:*") + filter_value[0, 1])
+                .set_parse_action(self._user_wildcard_action)
+                .leave_whitespace()
+            )
             user_filter = (
                 (pp.Literal("user:") + filter_value)
-                .set_parse_action(lambda t: UserFilter(t[1]))
+                .set_parse_action(lambda t: UserFilter(t[1], self._repo.symbols))
                 .leave_whitespace()
             )
+            label_wildcard_filter = pp.Literal("label:*").set_parse_action(
+                lambda _: LabelWildcardFilter(self._repo.labels, self._repo.symbols)
+            )
             label_filter = (
                 (pp.Literal("label:") + filter_value)
-                .set_parse_action(lambda t: LabelFilter(t[1]))
+                .set_parse_action(lambda t: LabelFilter(t[1], self._repo.symbols))
                 .leave_whitespace()
             )
             all_filter = pp.Literal("all").set_parse_action(lambda _: NullFilter())
-            filter_item = all_filter | team_filter | user_filter | label_filter
+            filter_item = (
+                all_filter
+                | team_filter
+                | user_wildcard_filter
+                | user_filter
+                | label_wildcard_filter
+                | label_filter
+            )
 
             expression = pp.Forward()
             complement_filter = (
@@ -243,9 +408,18 @@ class MetricsReporter(object):
         if len(tokens) == 2:
             name = tokens[1]
         else:
-            name = tokens[0].name
+            # Derived from the filter when needed, since it may change
+            # when a wildcard within the filter is bound
+            name = None
         return NamedFilter(name, [self._date_filter, tokens[0]])
 
+    def _user_wildcard_action(self, tokens):
+        group = tokens[1] if len(tokens) == 2 else ""
+        real_group = group if len(group) > 0 else "__contributors"
+        return UserWildcardFilter(
+            group, self._repo.get_usernames(real_group), self._repo.symbols
+        )
+
     def _expression_action(self, tokens):
         if len(tokens) == 3:
             if tokens[1] == "&":
@@ -542,12 +716,14 @@ class _Report(object):
 
 
 class NamedFilter(IntersectionFilter):
-    def __init__(self, name: str, filters: list[ItemFilter]):
+    def __init__(self, name: Optional[str], filters: list[ItemFilter]):
         IntersectionFilter.__init__(self, filters)
         self._name = name
 
     @property
     def name(self) -> str:
+        if self._name is None:
+            return self._filters[-1].name
         return self._name
 
     def __str__(self) -> str:
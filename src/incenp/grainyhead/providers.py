@@ -14,29 +14,54 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import heapq
 import json
 import logging
 import os.path
-from datetime import datetime
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
 from enum import Enum
 from os import makedirs
-from typing import Any, Callable, Optional
+from typing import Any, Callable, ClassVar, Optional
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlsplit
 
 from fastcore.basics import AttrDict  # type: ignore
+from fastcore.foundation import L  # type: ignore
 from fastcore.net import HTTP4xxClientError  # type: ignore
 from fastcore.xtras import dict2obj, obj2dict  # type: ignore
 from ghapi.core import GhApi  # type: ignore
-from ghapi.page import date2gh, paged  # type: ignore
+from ghapi.page import parse_link_hdr  # type: ignore
 
-from .caching import CachePolicy
+from .caching import CachePolicy, Compression, PageCache
+from .symbols import RepositorySymbols
 
 GITHUB_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
 
+# The journal of a cached data type is compacted when it contains more
+# items than that fraction of the total number of items
+_JOURNAL_MAX_RATIO = 0.1
+
 
 def gh2date(dtstr: str) -> datetime:
     return datetime.strptime(dtstr, GITHUB_DATE_FORMAT)
 
 
+def gh2timestamp(dtstr: str) -> int:
+    """Converts a GitHub date into a number of seconds since the epoch."""
+
+    # Much faster than strptime(); the 'Z' suffix is only accepted by
+    # fromisoformat() since Python 3.11
+    return int(datetime.fromisoformat(dtstr.replace("Z", "+00:00")).timestamp())
+
+
+def date2gh(dt: datetime) -> str:
+    dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat(timespec="seconds") + "Z"
+
+
 class RepositoryItemType(Enum):
     """The types of items we are dealing with from GitHub."""
 
@@ -50,42 +75,89 @@ class RepositoryItemType(Enum):
     COMMITTERS = 8
 
 
-class RepositoryItem(AttrDict):
+class LazyAttrDict(AttrDict):
+    """An AttrDict that converts its nested values on demand.
+
+    Contrary to the objects created by fastcore's dict2obj(), which
+    converts recursively all nested dictionaries and lists when the
+    object is created, nested dictionaries are only converted into
+    LazyAttrDict objects when they are accessed as attributes. This
+    allows to wrap items freshly decoded from JSON at almost no cost.
+    """
+
+    def __getattr__(self, k: str) -> Any:
+        if k not in self:
+            raise AttributeError(k)
+        v = self[k]
+        if type(v) is dict:
+            v = self[k] = LazyAttrDict(v)
+        elif type(v) is list and len(v) > 0 and type(v[0]) is dict:
+            v = self[k] = [LazyAttrDict(i) if type(i) is dict else i for i in v]
+        return v
+
+
+class RepositoryItem(LazyAttrDict):
     """An item from a GitHub repository.
 
     This class extends the AttrDict class used by GhApi to provide
     helper methods to manipulate the items.
+
+    The creation, update, and closing times of an item are stored in
+    the item itself (as 'created_ts', 'updated_ts', and 'closed_ts'),
+    as numbers of seconds since the epoch, when the item is fetched
+    from GitHub, so that they are cached along with the item and never
+    need to be parsed again. For items cached before those fields were
+    introduced, they are computed and stored the first time they are
+    needed.
     """
 
+    @property
+    def creation_timestamp(self) -> int:
+        """The creation time, in seconds since the epoch."""
+
+        if (ts := self.get("created_ts")) is None:
+            ts = self["created_ts"] = gh2timestamp(self.created_at)
+        return ts
+
+    @property
+    def update_timestamp(self) -> int:
+        """The last update time, in seconds since the epoch."""
+
+        if (ts := self.get("updated_ts")) is None:
+            ts = self["updated_ts"] = gh2timestamp(self.updated_at)
+        return ts
+
     @property
     def creation_time(self) -> datetime:
-        return datetime.strptime(self.created_at, GITHUB_DATE_FORMAT)
+        return datetime.fromtimestamp(self.creation_timestamp, timezone.utc)
 
     @property
     def update_time(self) -> datetime:
-        return datetime.strptime(self.updated_at, GITHUB_DATE_FORMAT)
+        return datetime.fromtimestamp(self.update_timestamp, timezone.utc)
 
     def _filter_time(
         self,
-        time: datetime,
+        timestamp: int,
         after: Optional[datetime] = None,
         before: Optional[datetime] = None,
     ) -> bool:
-        return (not after or time > after) and (not before or time < before)
+        return (not after or timestamp > after.timestamp()) and (
+            not before or timestamp < before.timestamp()
+        )
 
     def created(
         self, after: Optional[datetime] = None, before: Optional[datetime] = None
     ) -> bool:
         """Indicates whether the item was created in a given time span."""
 
-        return self._filter_time(self.creation_time, after, before)
+        return self._filter_time(self.creation_timestamp, after, before)
 
     def updated(
         self, after: Optional[datetime] = None, before: Optional[datetime] = None
     ) -> bool:
         """Indicates whether the item was updated in a given time span."""
 
-        return self._filter_time(self.update_time, after, before)
+        return self._filter_time(self.update_timestamp, after, before)
 
     @property
     def user_name(self) -> Optional[str]:
@@ -100,7 +172,7 @@ class RepositoryItem(AttrDict):
         return []
 
     def __hash__(self) -> int:
-        return self.id
+        return hash(self.id)
 
 
 class IssueItem(RepositoryItem):
@@ -110,21 +182,30 @@ class IssueItem(RepositoryItem):
     """
 
     @property
-    def close_time(self) -> Optional[datetime]:
+    def close_timestamp(self) -> Optional[int]:
+        """The closing time, in seconds since the epoch, or None if the
+        issue is open."""
+
         if not self.closed_at:
             return None
-        return datetime.strptime(self.closed_at, GITHUB_DATE_FORMAT)
+        if (ts := self.get("closed_ts")) is None:
+            ts = self["closed_ts"] = gh2timestamp(self.closed_at)
+        return ts
+
+    @property
+    def close_time(self) -> Optional[datetime]:
+        if (ts := self.close_timestamp) is None:
+            return None
+        return datetime.fromtimestamp(ts, timezone.utc)
 
     def closed(
         self, after: Optional[datetime] = None, before: Optional[datetime] = None
     ) -> bool:
         """Indicates whether the issue was closed in a given time span."""
 
-        if not self.closed_at:
+        if (ts := self.close_timestamp) is None:
             return False
-        return self._filter_time(
-            datetime.strptime(self.close_at, GITHUB_DATE_FORMAT), after, before
-        )
+        return self._filter_time(ts, after, before)
 
     @property
     def label_strings(self) -> list[str]:
@@ -150,8 +231,10 @@ class CommitItem(RepositoryItem):
     """A git commit."""
 
     @property
-    def creation_time(self) -> datetime:
-        return datetime.strptime(self.commit.author.date, GITHUB_DATE_FORMAT)
+    def creation_timestamp(self) -> int:
+        if (ts := self.get("created_ts")) is None:
+            ts = self["created_ts"] = gh2timestamp(self.commit.author.date)
+        return ts
 
     @property
     def user_name(self) -> str:
@@ -175,9 +258,479 @@ class ReleaseItem(RepositoryItem):
             return None
 
 
+class Record(object):
+    """Base class for compact, read-only representations of items.
+
+    The fields of a record are stored in slots rather than in a
+    dictionary, which considerably reduces the memory needed to keep
+    many records around. Derived classes declare the fields they hold
+    in their __slots__, and may convert the values of some fields (e.g.
+    nested objects) by listing them in _nested, which maps the name of
+    a field to the slot where to store its converted value and to the
+    function to convert it.
+
+    Fields of the original item that are not declared in the slots of
+    the record are kept in a separate dictionary, so that no data are
+    lost; fields that were absent from the original item are also
+    absent from the record (accessing them raises AttributeError).
+    """
+
+    __slots__ = ("_extra",)
+
+    _fields: ClassVar[frozenset[str]] = frozenset()
+    _nested: ClassVar[
+        dict[str, tuple[str, Callable[[Any, RepositorySymbols], Any]]]
+    ] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(
+            f
+            for c in cls.__mro__
+            for f in getattr(c, "__slots__", ())
+            if not f.startswith("_")
+        )
+
+    def __init__(self, data: dict[str, Any], symbols: RepositorySymbols):
+        """Creates a new instance.
+
+        :param data: the item to represent, as a dictionary
+        :param symbols: the symbol tables used to intern user logins
+            and label names, and to share nested objects
+        """
+
+        self._extra = None
+        extra = None
+        for k, v in data.items():
+            if (nested := self._nested.get(k)) is not None:
+                slot, converter = nested
+                setattr(self, slot, converter(v, symbols) if v is not None else None)
+            elif k in self._fields:
+                setattr(self, k, v)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[k] = v
+        self._extra = extra
+
+    def __getattr__(self, k: str) -> Any:
+        # Only called for fields that are not set in a slot
+        if self._extra is not None and k in self._extra:
+            return self._extra[k]
+        raise AttributeError(k)
+
+    def get(self, k: str, default: Any = None) -> Any:
+        """Gets the value of a field, as for a dictionary."""
+
+        return getattr(self, k, default)
+
+    def __repr__(self) -> str:
+        fields = {f: getattr(self, f) for f in sorted(self._fields) if hasattr(self, f)}
+        if self._extra is not None:
+            fields.update(self._extra)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class UserRecord(Record):
+    """A GitHub user, as found in the items."""
+
+    __slots__ = ("login", "html_url")
+    _nested = {"login": ("login", lambda v, s: s.users.canonical(v))}
+
+
+class LabelRecord(Record):
+    """A label, as found in the items."""
+
+    __slots__ = ("name",)
+    _nested = {"name": ("name", lambda v, s: s.labels.canonical(v))}
+
+
+def _to_user(value: dict[str, Any], symbols: RepositorySymbols) -> UserRecord:
+    # All items by the same user share a single record of that user
+    n = symbols.users.intern(value["login"])
+    if (user := symbols.user_records.get(n)) is None:
+        user = symbols.user_records.setdefault(n, UserRecord(value, symbols))
+    return user
+
+
+def _to_users(value: list[Any], symbols: RepositorySymbols) -> list[UserRecord]:
+    return [_to_user(v, symbols) for v in value]
+
+
+def _to_label(n: int, symbols: RepositorySymbols) -> LabelRecord:
+    if (label := symbols.label_records.get(n)) is None:
+        label = symbols.label_records.setdefault(
+            n, LabelRecord({"name": symbols.labels.name(n)}, symbols)
+        )
+    return label
+
+
+def _to_label_mask(value: list[Any], symbols: RepositorySymbols) -> int:
+    return symbols.labels.get_mask(v["name"] for v in value)
+
+
+def _to_object(value: Any, _: RepositorySymbols) -> Any:
+    return dict2obj(value)
+
+
+class _LabelledRecord(Record):
+    """Base class for records that may carry labels.
+
+    The labels are stored as a bitmask of label identifiers, from the
+    symbol table of the repository.
+    """
+
+    __slots__ = ("_label_mask", "_symbols")
+    _nested = {"labels": ("_label_mask", _to_label_mask)}
+
+    def __init__(self, data: dict[str, Any], symbols: RepositorySymbols):
+        self._symbols = symbols
+        self._label_mask = 0
+        Record.__init__(self, data, symbols)
+
+    @property
+    def label_mask(self) -> int:
+        """The bitmask of the labels associated with this item."""
+
+        return self._label_mask
+
+    @property
+    def label_strings(self) -> list[str]:
+        """The labels associated with this item, if any."""
+
+        return self._symbols.labels.get_names(self.label_mask)
+
+    @property
+    def labels(self) -> list[LabelRecord]:
+        mask = self.label_mask
+        return [
+            _to_label(n, self._symbols)
+            for n in range(mask.bit_length())
+            if mask & (1 << n)
+        ]
+
+
+class ItemRecord(_LabelledRecord):
+    """Compact equivalent of a RepositoryItem.
+
+    MemoryRepositoryProvider converts the items it gets from its
+    backend into such records, which provide the same properties and
+    methods as the RepositoryItem classes. In addition, the user_id
+    and label_mask fields hold the identifiers of the item's user and
+    labels in the symbol tables of the repository, for fast filtering.
+    """
+
+    __slots__ = (
+        "id",
+        "created_at",
+        "updated_at",
+        "user",
+        "created_ts",
+        "updated_ts",
+        "user_id",
+    )
+    _nested = {**_LabelledRecord._nested, "user": ("user", _to_user)}
+
+    def __init__(self, data: dict[str, Any], symbols: RepositorySymbols):
+        _LabelledRecord.__init__(self, data, symbols)
+        # Items cached before timestamps were stored lack them
+        if not hasattr(self, "created_ts"):
+            self.created_ts = gh2timestamp(self._get_creation_date())
+        if not hasattr(self, "updated_ts") and self.get("updated_at"):
+            self.updated_ts = gh2timestamp(self.updated_at)
+        name = self._get_user_name()
+        self.user_id = symbols.users.intern(name) if name is not None else None
+
+    def _get_creation_date(self) -> str:
+        return self.created_at
+
+    def _get_user_name(self) -> Optional[str]:
+        return self.user.login
+
+    @property
+    def _key(self) -> Any:
+        return self.id
+
+    @property
+    def creation_timestamp(self) -> int:
+        """The creation time, in seconds since the epoch."""
+
+        return self.created_ts
+
+    @property
+    def update_timestamp(self) -> int:
+        """The last update time, in seconds since the epoch."""
+
+        return self.updated_ts
+
+    @property
+    def creation_time(self) -> datetime:
+        return datetime.fromtimestamp(self.created_ts, timezone.utc)
+
+    @property
+    def update_time(self) -> datetime:
+        return datetime.fromtimestamp(self.updated_ts, timezone.utc)
+
+    def _filter_time(
+        self,
+        timestamp: int,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+    ) -> bool:
+        return (not after or timestamp > after.timestamp()) and (
+            not before or timestamp < before.timestamp()
+        )
+
+    def created(
+        self, after: Optional[datetime] = None, before: Optional[datetime] = None
+    ) -> bool:
+        """Indicates whether the item was created in a given time span."""
+
+        return self._filter_time(self.created_ts, after, before)
+
+    def updated(
+        self, after: Optional[datetime] = None, before: Optional[datetime] = None
+    ) -> bool:
+        """Indicates whether the item was updated in a given time span."""
+
+        return self._filter_time(self.updated_ts, after, before)
+
+    @property
+    def user_name(self) -> Optional[str]:
+        """The name of the user who created this item."""
+
+        if self.user_id is None:
+            return None
+        return self._symbols.users.name(self.user_id)
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and other._key == self._key
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+
+class IssueRecord(ItemRecord):
+    """Compact equivalent of an IssueItem."""
+
+    __slots__ = (
+        "number",
+        "title",
+        "html_url",
+        "state",
+        "closed_at",
+        "closed_ts",
+        "assignees",
+        "pull_request",
+    )
+    _nested = {
+        **ItemRecord._nested,
+        "assignees": ("assignees", _to_users),
+        "pull_request": ("pull_request", _to_object),
+    }
+
+    def __init__(self, data: dict[str, Any], symbols: RepositorySymbols):
+        ItemRecord.__init__(self, data, symbols)
+        if not hasattr(self, "closed_ts") and self.get("closed_at"):
+            self.closed_ts = gh2timestamp(self.closed_at)
+
+    @property
+    def close_timestamp(self) -> Optional[int]:
+        """The closing time, in seconds since the epoch, or None if the
+        issue is open."""
+
+        return self.get("closed_ts") if self.get("closed_at") else None
+
+    @property
+    def close_time(self) -> Optional[datetime]:
+        if (ts := self.close_timestamp) is None:
+            return None
+        return datetime.fromtimestamp(ts, timezone.utc)
+
+    def closed(
+        self, after: Optional[datetime] = None, before: Optional[datetime] = None
+    ) -> bool:
+        """Indicates whether the issue was closed in a given time span."""
+
+        if (ts := self.close_timestamp) is None:
+            return False
+        return self._filter_time(ts, after, before)
+
+
+class _EventIssueRecord(_LabelledRecord):
+    """The issue an event relates to, as embedded in the event."""
+
+    __slots__ = ("number", "pull_request")
+    _nested = {
+        **_LabelledRecord._nested,
+        "pull_request": ("pull_request", _to_object),
+    }
+
+
+def _to_event_issue(value: dict[str, Any], symbols: RepositorySymbols) -> Any:
+    # All events relating to the same issue share a single copy of that
+    # issue, which is the issue itself if it has already been loaded
+    if (n := value.get("number")) is None:
+        return _EventIssueRecord(value, symbols)
+    if (issue := symbols.issues.get(n)) is None:
+        issue = symbols.issues.setdefault(n, _EventIssueRecord(value, symbols))
+    return issue
+
+
+class EventRecord(ItemRecord):
+    """Compact equivalent of an EventItem.
+
+    The issue of an event is the IssueRecord of that issue, if issues
+    have been loaded in memory; otherwise it is the copy that was
+    embedded in the event. The labels of an event are those of its
+    issue.
+    """
+
+    __slots__ = ("event", "actor", "_issue")
+    _nested = {
+        **ItemRecord._nested,
+        "actor": ("actor", _to_user),
+        "issue": ("_issue", _to_event_issue),
+    }
+
+    @property
+    def issue(self) -> Any:
+        """The issue this event relates to."""
+
+        # The issue may have been loaded after the event
+        if (issue := self._issue) is None or (n := issue.get("number")) is None:
+            return issue
+        return self._symbols.issues.get(n, issue)
+
+    @property
+    def label_mask(self) -> int:
+        if (issue := self.get("issue")) is None:
+            return 0
+        return issue.label_mask
+
+    def _get_user_name(self) -> Optional[str]:
+        if self.actor is not None:
+            return self.actor.login
+        else:
+            return None
+
+
+class CommitRecord(ItemRecord):
+    """Compact equivalent of a CommitItem."""
+
+    __slots__ = ("sha", "commit", "author")
+    _nested = {
+        **ItemRecord._nested,
+        "commit": ("commit", _to_object),
+        "author": ("author", _to_user),
+    }
+
+    def _get_creation_date(self) -> str:
+        return self.commit.author.date
+
+    def _get_user_name(self) -> Optional[str]:
+        if self.author:
+            return self.author.login
+        else:
+            return self.commit.author.name
+
+    @property
+    def _key(self) -> Any:
+        return self.sha
+
+
+class ReleaseRecord(ItemRecord):
+    """Compact equivalent of a ReleaseItem."""
+
+    __slots__ = ("name", "tag_name", "author")
+    _nested = {**ItemRecord._nested, "author": ("author", _to_user)}
+
+    def _get_user_name(self) -> Optional[str]:
+        if self.author is not None:
+            return self.author.login
+        else:
+            return None
+
+
+# The fields of each type of items that are kept by default when items
+# are fetched from GitHub. Each field is mapped either to None (to keep
+# the entire value of the field) or to the fields to keep in the value
+# (an object, or a list of objects) of the field. Those are the fields
+# actually used by GrainyHead, plus the identifier of each item.
+_USER_FIELDS = {"login": None, "html_url": None}
+_LABEL_FIELDS = {"name": None}
+DEFAULT_FIELDS: dict[RepositoryItemType, dict[str, Any]] = {
+    RepositoryItemType.ISSUES: {
+        "id": None,
+        "number": None,
+        "title": None,
+        "html_url": None,
+        "state": None,
+        "created_at": None,
+        "updated_at": None,
+        "closed_at": None,
+        "user": _USER_FIELDS,
+        "labels": _LABEL_FIELDS,
+        "assignees": _USER_FIELDS,
+        "pull_request": {"html_url": None, "merged_at": None},
+    },
+    RepositoryItemType.COMMENTS: {
+        "id": None,
+        "created_at": None,
+        "updated_at": None,
+        "user": _USER_FIELDS,
+    },
+    RepositoryItemType.TEAMS: {
+        "id": None,
+        "slug": None,
+        "name": None,
+        "members": _USER_FIELDS,
+    },
+    RepositoryItemType.LABELS: {
+        "id": None,
+        "name": None,
+        "color": None,
+        "description": None,
+    },
+    RepositoryItemType.EVENTS: {
+        "id": None,
+        "event": None,
+        "created_at": None,
+        "actor": _USER_FIELDS,
+        "issue": {
+            "number": None,
+            "labels": _LABEL_FIELDS,
+            "pull_request": {"html_url": None},
+        },
+    },
+    RepositoryItemType.COMMITS: {
+        "sha": None,
+        "commit": {"author": {"name": None, "date": None}},
+        "author": _USER_FIELDS,
+    },
+    RepositoryItemType.RELEASES: {
+        "id": None,
+        "name": None,
+        "tag_name": None,
+        "created_at": None,
+        "author": _USER_FIELDS,
+    },
+    RepositoryItemType.COMMITTERS: {"login": None, "contributions": None},
+}
+
+
 class RepositoryProvider(object):
     """Provides access to the data from a GitHub repository."""
 
+    # The classes of the items of each type
+    _wrappers = {
+        RepositoryItemType.ISSUES: IssueItem,
+        RepositoryItemType.COMMITS: CommitItem,
+        RepositoryItemType.COMMENTS: RepositoryItem,
+        RepositoryItemType.EVENTS: EventItem,
+        RepositoryItemType.RELEASES: ReleaseItem,
+    }
+
     def get_data(
         self, item_type: RepositoryItemType, since: Optional[datetime] = None
     ) -> Any:
@@ -190,8 +743,178 @@ class RepositoryProvider(object):
 
         pass
 
+    def iter_data(
+        self, item_type: RepositoryItemType, since: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        """Iterates over a specific type of data from the repository.
+
+        This is similar to get_data(), except that providers that can
+        do so will yield the items as soon as they are available (e.g.
+        as pages of results arrive from GitHub), without ever holding
+        all of them in memory. The default implementation merely
+        iterates over the list returned by get_data().
+
+        :param item_type: the type of data to fetch
+        :param since: only fetch data from after that timestamp
+        :return: an iterator of AttrDict objects
+        """
+
+        yield from self.get_data(item_type, since)
+
+    def iter_pages(
+        self,
+        item_type: RepositoryItemType,
+        since: Optional[datetime] = None,
+        first_page: int = 1,
+    ) -> Iterator[tuple[int, list[Any]]]:
+        """Iterates over the pages of a specific type of data.
+
+        This allows a caller to record how far it has got into fetching
+        the data, and later resume fetching from the next page. The
+        default implementation yields all the items as a single page.
+
+        :param item_type: the type of data to fetch
+        :param since: only fetch data from after that timestamp
+        :param first_page: the number of the first page to fetch
+        :return: an iterator of (page number, list of items) tuples
+        """
+
+        if first_page == 1:
+            yield (1, list(self.get_data(item_type, since)))
+
+    def find_data(
+        self,
+        item_type: RepositoryItemType,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        user: Optional[str] = None,
+        event: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """Finds the items of a specific type that match some criteria.
+
+        The default implementation iterates over all the items and
+        tests them one by one. Providers able to do better (e.g. by
+        using indexes) should override it.
+
+        :param item_type: the type of data to search
+        :param after: only find items created after that timestamp
+        :param before: only find items created before that timestamp
+        :param user: only find items created by that user
+        :param event: only find events of that type
+        :param label: only find items that carry that label
+        :return: an iterator of the matching items
+        """
+
+        yield from self._match_items(
+            self.iter_data(item_type), item_type, after, before, user, event, label
+        )
+
+    def _match_items(
+        self,
+        items: Iterable[Any],
+        item_type: RepositoryItemType,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        user: Optional[str] = None,
+        event: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """Selects the items that match the criteria of find_data()."""
+
+        wrapper = self._wrappers.get(item_type, None)
+        for item in items:
+            if wrapper is not None and isinstance(item, AttrDict):
+                item.__class__ = wrapper
+            if after is not None or before is not None:
+                if not item.created(after, before):
+                    continue
+            if user is not None and item.user_name != user:
+                continue
+            if event is not None and item.event != event:
+                continue
+            if label is not None and label not in item.label_strings:
+                continue
+            yield item
+
+    @classmethod
+    def _make_item(cls, item_type: RepositoryItemType, data: dict) -> AttrDict:
+        """Wraps a freshly decoded item into an object of the class
+        matching its type."""
+
+        return cls._wrappers.get(item_type, LazyAttrDict)(data)
+
+    @staticmethod
+    def _get_item_date(item_type: RepositoryItemType, item: AttrDict) -> str:
+        """Gets the creation time of an item, as a GitHub date."""
+
+        if item_type == RepositoryItemType.COMMITS:
+            return item.commit.author.date
+        else:
+            return item.created_at
+
+    @classmethod
+    def _get_item_timestamp(cls, item_type: RepositoryItemType, item: AttrDict) -> int:
+        """Gets the creation time of an item, in seconds since the epoch."""
+
+        if (ts := item.get("created_ts")) is None:
+            ts = gh2timestamp(cls._get_item_date(item_type, item))
+        return ts
+
+    def _add_timestamps(self, item_type: RepositoryItemType, items: list) -> list:
+        """Stores the creation, update, and closing times of freshly
+        fetched items as numbers of seconds since the epoch.
+
+        :return: the items
+        """
+
+        if item_type not in self._wrappers:
+            return items
+        for item in items:
+            item["created_ts"] = gh2timestamp(self._get_item_date(item_type, item))
+            if updated_at := item.get("updated_at"):
+                item["updated_ts"] = gh2timestamp(updated_at)
+            if closed_at := item.get("closed_at"):
+                item["closed_ts"] = gh2timestamp(closed_at)
+        return items
+
+    @staticmethod
+    def _get_item_key(item_type: RepositoryItemType, item: AttrDict) -> str:
+        """Gets the value that uniquely identifies an item."""
+
+        if item_type == RepositoryItemType.COMMITS:
+            return item.sha
+        elif item_type == RepositoryItemType.TEAMS:
+            return item.slug
+        elif item_type == RepositoryItemType.COMMITTERS:
+            return item.login
+        else:
+            return str(item.id)
+
+    def prefetch(
+        self,
+        item_types: list[RepositoryItemType],
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+    ) -> None:
+        """Fetches in advance several types of data from the repository.
+
+        This is merely a hint that the data of the specified types will
+        be needed soon, so that providers able to keep the data around
+        may fetch them all concurrently rather than one after the other.
+        The default implementation does nothing.
+
+        :param item_types: the types of data that will be needed
+        :param after: if set, only the items created after that
+            timestamp will be needed
+        :param before: if set, only the items created before that
+            timestamp will be needed
+        """
+
+        pass
+
     @property
-    def issues(self) -> list[IssueItem]:
+    def issues(self) -> list[Any]:
         return [
             i
             for i in self.get_data(RepositoryItemType.ISSUES)
@@ -199,7 +922,7 @@ class RepositoryProvider(object):
         ]
 
     @property
-    def pull_requests(self) -> list[IssueItem]:
+    def pull_requests(self) -> list[Any]:
         return [
             i
             for i in self.get_data(RepositoryItemType.ISSUES)
@@ -219,15 +942,15 @@ class RepositoryProvider(object):
         return self.get_data(RepositoryItemType.LABELS)
 
     @property
-    def events(self) -> list[EventItem]:
+    def events(self) -> list[Any]:
         return self.get_data(RepositoryItemType.EVENTS)
 
     @property
-    def commits(self) -> list[CommitItem]:
+    def commits(self) -> list[Any]:
         return self.get_data(RepositoryItemType.COMMITS)
 
     @property
-    def releases(self) -> list[ReleaseItem]:
+    def releases(self) -> list[Any]:
         return self.get_data(RepositoryItemType.RELEASES)
 
     @property
@@ -238,14 +961,39 @@ class RepositoryProvider(object):
 class OnlineRepositoryProvider(RepositoryProvider):
     """Provides direct access to the data from a GitHub repository."""
 
-    def __init__(self, api: GhApi):
+    def __init__(
+        self,
+        api: GhApi,
+        workers: int = 1,
+        teams: Optional[list[str]] = None,
+        page_cache: Optional[PageCache] = None,
+        fields: Optional[dict[RepositoryItemType, dict[str, Any]]] = DEFAULT_FIELDS,
+    ):
         """Creates a new instance.
 
         :param api: a ghapi.core.GhApi object
+        :param workers: the maximal number of requests to perform
+            concurrently; the default (1) is to perform requests one at
+            a time
+        :param teams: if set, only the members of the teams in that
+            list (and the collaborators of the repository) are fetched;
+            the default is to fetch the members of all the teams
+        :param page_cache: if set, the cache where to store the pages
+            of results that can later be requested conditionally
+        :param fields: the fields to keep in the items of each type
+            (see DEFAULT_FIELDS), all other fields being discarded as
+            soon as the items are received; if None, items are kept
+            as they are sent by GitHub
         """
 
         self._api = api
+        self._workers = workers
+        self._teams = teams
+        self._page_cache = page_cache
+        self._fields = fields
         self._calls = {
+            RepositoryItemType.ISSUES: api.issues.list_for_repo,
+            RepositoryItemType.COMMITTERS: api.repos.list_contributors,
             RepositoryItemType.COMMENTS: api.issues.list_comments_for_repo,
             RepositoryItemType.LABELS: api.issues.list_labels_for_repo,
             RepositoryItemType.EVENTS: api.issues.list_events_for_repo,
@@ -260,70 +1008,272 @@ class OnlineRepositoryProvider(RepositoryProvider):
     def get_data(
         self, item_type: RepositoryItemType, since: Optional[datetime] = None
     ) -> Any:
-        data = None
+        return list(self.iter_data(item_type, since))
+
+    def iter_data(
+        self, item_type: RepositoryItemType, since: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        for _, page in self.iter_pages(item_type, since):
+            yield from page
+
+    def iter_pages(
+        self,
+        item_type: RepositoryItemType,
+        since: Optional[datetime] = None,
+        first_page: int = 1,
+    ) -> Iterator[tuple[int, list[Any]]]:
+        fields = self._fields.get(item_type) if self._fields is not None else None
+        for n, page in self._iter_raw_pages(item_type, since, first_page):
+            if fields is not None:
+                page = [dict2obj(self._project(item, fields)) for item in page]
+            yield (n, self._add_timestamps(item_type, page))
+
+    def _iter_raw_pages(
+        self,
+        item_type: RepositoryItemType,
+        since: Optional[datetime],
+        first_page: int,
+    ) -> Iterator[tuple[int, list[Any]]]:
+        if item_type == RepositoryItemType.TEAMS:
+            # Teams are always fetched as a whole
+            if first_page == 1:
+                yield (1, self._fetch_teams())
+            return
+
+        apiargs = {}
+        conditional = False
         if item_type == RepositoryItemType.ISSUES:
-            data = self._fetch(
-                self._api.issues.list_for_repo, apiargs={"state": "all"}, since=since
-            )
-        elif item_type == RepositoryItemType.TEAMS:
-            data = self._fetch_teams()
-        elif item_type == RepositoryItemType.COMMITTERS:
-            data = self._fetch_committers()
-        else:
-            data = self._fetch(self._calls[item_type], since=since)
-        return data
+            apiargs = {"state": "all"}
+            # Conditional requests are only worth it for full fetches,
+            # as 'since' is different for each incremental fetch
+            conditional = since is None
+        elif item_type in [RepositoryItemType.LABELS, RepositoryItemType.COMMITTERS]:
+            since = None
+            conditional = True
+        yield from self._iter_fetch_pages(
+            self._calls[item_type], apiargs, since, conditional, first_page
+        )
 
-    def _fetch_committers(self) -> list[AttrDict]:
-        committers = []
-        for page in paged(self._api.repos.list_contributors, per_page=100):
-            committers.extend(page)
-        return committers
+    def _project(self, value: Any, fields: dict[str, Any]) -> Any:
+        """Keeps only the specified fields of an object or of each
+        object in a list."""
+
+        if isinstance(value, (list, L)):
+            return [self._project(v, fields) for v in value]
+        elif not isinstance(value, dict):
+            return value
+        return {
+            k: v if fields[k] is None else self._project(v, fields[k])
+            for k, v in value.items()
+            if k in fields
+        }
 
     def _fetch(
-        self, apicall: Callable, apiargs: dict = {}, since: Optional[datetime] = None
+        self, apicall: Callable, apiargs: dict = {}, conditional: bool = False
     ) -> list[AttrDict]:
-        """Generic method to fetch data from GitHub."""
+        return list(self._iter_fetch(apicall, apiargs, conditional=conditional))
+
+    def _iter_fetch(
+        self,
+        apicall: Callable,
+        apiargs: dict = {},
+        since: Optional[datetime] = None,
+        conditional: bool = False,
+    ) -> Iterator[AttrDict]:
+        for _, page in self._iter_fetch_pages(apicall, apiargs, since, conditional):
+            yield from page
+
+    def _iter_fetch_pages(
+        self,
+        apicall: Callable,
+        apiargs: dict = {},
+        since: Optional[datetime] = None,
+        conditional: bool = False,
+        first_page: int = 1,
+    ) -> Iterator[tuple[int, list[AttrDict]]]:
+        """Generic method to fetch data from GitHub.
+
+        Pages are yielded, along with their number, as soon as they have
+        been received.
+
+        If 'conditional' is True and a page cache is available, pages
+        are requested conditionally, and their cached copies are reused
+        if they have not changed. This should only be used for calls
+        whose results are always fetched in full.
+        """
 
         if since is not None:
             if apicall in self._calls_without_since:
                 # No support for 'since=' parameter in those calls,
                 # we need to ensure manually that we don't get more
                 # than what we want
-                return self._fetch_since(apicall, since, apiargs)
-            apiargs["since"] = date2gh(since)
+                yield from self._iter_fetch_since(apicall, since, apiargs, first_page)
+                return
+            apiargs = {**apiargs, "since": date2gh(since)}
+
+        page, last_page = self._fetch_page(apicall, first_page, apiargs, conditional)
+        if len(page) == 0:
+            return
+        yield (first_page, page)
+        if self._workers > 1:
+            if last_page > first_page:
+                yield from self._iter_fetch_parallel(
+                    apicall, apiargs, conditional, first_page + 1, last_page
+                )
+            return
 
-        things = []
-        for page in paged(apicall, per_page=100, **apiargs):
-            things.extend(page)
+        n = first_page + 1
+        while len(page := self._fetch_page(apicall, n, apiargs, conditional)[0]):
+            yield (n, page)
+            n += 1
 
-        return things
+    def _iter_fetch_parallel(
+        self,
+        apicall: Callable,
+        apiargs: dict,
+        conditional: bool,
+        first_page: int,
+        last_page: int,
+    ) -> Iterator[tuple[int, list[AttrDict]]]:
+        """Fetches the remaining pages of a call concurrently.
+
+        This is called once the first page has been fetched alone, so
+        that we know the number of the last page from the 'Link' header
+        of the response. All the remaining pages are then fetched by a
+        pool of worker threads, and they are yielded in order.
+        To bound memory usage, no more than twice as many pages as
+        there are workers are requested ahead of the page being
+        consumed.
+        """
 
-    def _fetch_since(
-        self, apicall: Callable, since: datetime, apiargs: dict = {}
-    ) -> list[AttrDict]:
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            pending: deque[tuple[int, Future]] = deque()
+            for n in range(first_page, last_page + 1):
+                pending.append(
+                    (
+                        n,
+                        executor.submit(
+                            self._fetch_page, apicall, n, apiargs, conditional
+                        ),
+                    )
+                )
+                if len(pending) >= self._workers * 2:
+                    m, future = pending.popleft()
+                    yield (m, future.result()[0])
+            while len(pending) > 0:
+                m, future = pending.popleft()
+                yield (m, future.result()[0])
+
+    def _fetch_page(
+        self, apicall: Callable, n: int, apiargs: dict, conditional: bool
+    ) -> tuple[list[AttrDict], int]:
+        """Fetches a single page of results.
+
+        :return: the items in the page, and the number of the last page
+            as indicated by the 'Link' header
+        """
+
+        if not conditional or self._page_cache is None:
+            page = apicall(per_page=100, page=n, **apiargs)
+            return (list(page), self._get_last_page(self._api.recv_hdrs))
+
+        key = self._page_cache.get_key(apicall.path, n, apiargs)  # type: ignore
+        cached_page = self._page_cache.get(key)
+        headers = {}
+        if cached_page is not None:
+            if etag := cached_page.get("etag"):
+                headers["If-None-Match"] = etag
+            if last_modified := cached_page.get("last_modified"):
+                headers["If-Modified-Since"] = last_modified
+
+        try:
+            page = apicall(per_page=100, page=n, headers=headers, **apiargs)
+        except HTTPError as e:
+            if e.code == 304 and cached_page is not None:
+                items = list(dict2obj(cached_page["items"]))
+                return (items, cached_page["last_page"])
+            raise
+
+        recv_headers = {k.lower(): v for k, v in self._api.recv_hdrs.items()}
+        last_page = self._get_last_page(self._api.recv_hdrs)
+        if "etag" in recv_headers or "last-modified" in recv_headers:
+            self._page_cache.put(
+                key,
+                {
+                    "etag": recv_headers.get("etag"),
+                    "last_modified": recv_headers.get("last-modified"),
+                    "last_page": last_page,
+                    "items": self._project_page(apicall, obj2dict(page)),
+                },
+            )
+        return (list(page), last_page)
+
+    def _project_page(self, apicall: Callable, items: list[Any]) -> list[Any]:
+        """Keeps only the fields that will eventually be kept in the
+        items returned by an API call, so that a stored page does not
+        hold more than the items derived from it."""
+
+        if self._fields is None:
+            return items
+        teams_fields = self._fields.get(RepositoryItemType.TEAMS)
+        if apicall is self._api.teams.list:
+            fields = teams_fields
+        elif apicall in (
+            self._api.repos.list_collaborators,
+            self._api.teams.list_members_in_org,
+        ):
+            fields = teams_fields.get("members") if teams_fields is not None else None
+        else:
+            item_type = next((t for t, c in self._calls.items() if c is apicall), None)
+            fields = self._fields.get(item_type) if item_type is not None else None
+        return self._project(items, fields) if fields is not None else items
+
+    def _get_last_page(self, headers: dict[str, str]) -> int:
+        """Gets the number of the last page from a 'Link' header."""
+
+        link = next((v for k, v in headers.items() if k.lower() == "link"), "")
+        last = parse_link_hdr(link).get("last")
+        if last is None:
+            return 0
+        pages = parse_qs(urlsplit(last[0]).query).get("page", ["0"])
+        return int(pages[0])
+
+    def _iter_fetch_since(
+        self,
+        apicall: Callable,
+        since: datetime,
+        apiargs: dict = {},
+        first_page: int = 1,
+    ) -> Iterator[tuple[int, list[AttrDict]]]:
         """Specialized method for items without 'since=' support."""
 
-        things = []
-        for page in paged(apicall, per_page=100, **apiargs):
+        n = first_page
+        while len(page := self._fetch_page(apicall, n, apiargs, False)[0]):
+            # Remove everything before the cutoff timestamp
+            yield (n, [i for i in page if gh2date(i.created_at) >= since])
             if gh2date(page[-1].created_at) <= since:
                 # Stop fetching if we got what we were looking for
                 break
-            things.extend(page)
-
-        # Remove everything before the cutoff timestamp
-        return [i for i in things if gh2date(i.created_at) >= since]
+            n += 1
 
     def _fetch_teams(self) -> list[AttrDict]:
         teams = [AttrDict({"slug": "__collaborators"})]
         try:
-            teams.extend(self._fetch(self._api.teams.list))
+            teams.extend(self._fetch(self._api.teams.list, conditional=True))
         except HTTP4xxClientError:
             logging.warn(
                 "Cannot get teams list (possibly due to insufficient access rights)"
             )
 
-        for team in teams:
-            team["members"] = self._fetch_team_members(team.slug)
+        if self._teams is not None:
+            teams = [
+                t for t in teams if t.slug == "__collaborators" or t.slug in self._teams
+            ]
+
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            members = executor.map(self._fetch_team_members, [t.slug for t in teams])
+            for team, team_members in zip(teams, members):
+                team["members"] = team_members
 
         return teams
 
@@ -331,10 +1281,14 @@ class OnlineRepositoryProvider(RepositoryProvider):
         members = []
         try:
             if slug == "__collaborators":
-                members = self._fetch(self._api.repos.list_collaborators)
+                members = self._fetch(
+                    self._api.repos.list_collaborators, conditional=True
+                )
             else:
                 members = self._fetch(
-                    self._api.teams.list_members_in_org, {"team_slug": slug}
+                    self._api.teams.list_members_in_org,
+                    {"team_slug": slug},
+                    conditional=True,
                 )
         except HTTP4xxClientError:
             logging.warn(
@@ -345,14 +1299,43 @@ class OnlineRepositoryProvider(RepositoryProvider):
 
 
 class FileRepositoryProvider(RepositoryProvider):
-    """Provides access to cached data from a GitHub repository."""
+    """Provides access to cached data from a GitHub repository.
+
+    Data that have no creation time (labels, teams, and committers) are
+    cached in a single JSON file per type. Other data are partitioned
+    by month of creation: each type has its own directory, containing
+    one JSON file (or "segment") per month, and a manifest recording
+    the earliest and latest creation times found in each segment. This
+    allows find_data() to only read the segments that may contain items
+    created in the requested time window.
+
+    Data files (but not the manifests, journals, and checkpoint files)
+    may be compressed, in which case the extension of the compression
+    method is appended to their name. Data files are always read with
+    the method matching their extension, so changing the compression
+    method only affects the files written from then on.
+    """
+
+    _segmented_types = [
+        RepositoryItemType.ISSUES,
+        RepositoryItemType.COMMENTS,
+        RepositoryItemType.EVENTS,
+        RepositoryItemType.COMMITS,
+        RepositoryItemType.RELEASES,
+    ]
 
     def __init__(
-        self, directory: str, backend: RepositoryProvider, policy: CachePolicy
+        self,
+        directory: str,
+        backend: RepositoryProvider,
+        policy: CachePolicy,
+        compression: Compression = Compression.NONE,
     ):
         self._cachedir = directory
         self._backend = backend
         self._policy = policy
+        self._compression = compression
+        self._refreshed: set[RepositoryItemType] = set()
 
     def get_data(
         self, item_type: RepositoryItemType, since: Optional[datetime] = None
@@ -360,45 +1343,436 @@ class FileRepositoryProvider(RepositoryProvider):
         if self._policy == CachePolicy.DISABLED:
             return self._backend.get_data(item_type, since)
 
-        data = []
-        refresh = False
-
-        data_file = self._get_data_file(item_type)
-        if self._policy != CachePolicy.RESET and os.path.exists(data_file):
-            with open(data_file, "r") as f:
-                data = dict2obj(json.load(f))
-            mtime = os.path.getmtime(data_file)
-            if self._policy.refresh(mtime):
-                refresh = True
-                since = self._get_last_item_date(item_type, data)
+        data: list[AttrDict] = []
+        if self._policy != CachePolicy.RESET or item_type in self._refreshed:
+            data = list(self._iter_cache(item_type))
+            if len(data) > 0 and self._is_fresh(item_type):
+                return data
 
-        if len(data) == 0:
-            refresh = True
-            since = None
+        since = None
+        if len(data) > 0:
+            since = self._get_last_item_date(item_type, data)
 
-        if refresh:
-            new_data = self._backend.get_data(item_type, since)
-            if since is not None:
-                # Append existing data, if we asked for new data only
-                new_data.extend(data)
+        makedirs(self._cachedir, 0o755, True)
+        checkpoint_file = self._get_data_file(item_type) + ".partial"
+        new_data = self._fetch_with_checkpoint(item_type, since, checkpoint_file)
+        if since is not None:
+            # Merge with existing data, if we asked for new data only;
+            # fetched copies of items that were already in the cache
+            # replace the cached ones
+            new_data = self._purge_duplicates(new_data, item_type)
+            data = self._merge_data(item_type, data, new_data)
+            self._write_cache(item_type, data, new_data)
+        else:
             data = self._purge_duplicates(new_data, item_type)
-            makedirs(self._cachedir, 0o755, True)
-            with open(data_file, "w") as f:
-                json.dump(obj2dict(data), f, indent=0)
+            self._write_cache(item_type, data)
+        os.remove(checkpoint_file)
+        self._refreshed.add(item_type)
+
+        return data
+
+    def iter_data(
+        self, item_type: RepositoryItemType, since: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        if self._policy == CachePolicy.DISABLED:
+            yield from self._backend.iter_data(item_type, since)
+            return
+
+        if self._is_fresh(item_type):
+            empty = True
+            for item in self._iter_cache(item_type):
+                empty = False
+                yield item
+            if not empty:
+                return
+
+        # The cache must be refreshed, which requires all the data
+        yield from self.get_data(item_type, since)
+
+    def find_data(
+        self,
+        item_type: RepositoryItemType,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        user: Optional[str] = None,
+        event: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> Iterator[Any]:
+        if self._policy != CachePolicy.DISABLED and self._is_fresh(item_type):
+            items = self._iter_cache(item_type, after, before)
+        else:
+            items = self.iter_data(item_type)
+        yield from self._match_items(
+            items, item_type, after, before, user, event, label
+        )
+
+    def _is_fresh(self, item_type: RepositoryItemType) -> bool:
+        """Indicates whether the cached data may be used as they are."""
+
+        if item_type in self._refreshed:
+            return True
+        if self._policy == CachePolicy.RESET:
+            return False
+        cache_file = self._get_cache_file(item_type)
+        return cache_file is not None and not self._policy.refresh_file(cache_file)
+
+    def _fetch_with_checkpoint(
+        self,
+        item_type: RepositoryItemType,
+        since: Optional[datetime],
+        checkpoint_file: str,
+    ) -> list[AttrDict]:
+        """Fetches data from the backend, checkpointing each page.
+
+        Each page is appended to the checkpoint file as soon as it has
+        been received. If a previous fetch of the same data has been
+        interrupted, the pages it has already received are read back
+        from the checkpoint file, and the fetch resumes from the next
+        page instead of starting over.
+        """
+
+        header = {"since": since.isoformat() if since else None}
+        data: list[AttrDict] = []
+        first_page = 1
+        size = 0
+        if self._policy != CachePolicy.RESET and os.path.exists(checkpoint_file):
+            data, first_page, size = self._read_checkpoint(
+                item_type, checkpoint_file, header
+            )
+
+        with open(checkpoint_file, "a") as f:
+            # Discard anything after the last complete page
+            f.truncate(size)
+            if size == 0:
+                f.write(json.dumps(header) + "\n")
+            for n, page in self._backend.iter_pages(item_type, since, first_page):
+                f.write(json.dumps({"page": n, "items": obj2dict(page)}) + "\n")
+                f.flush()
+                data.extend(page)
 
         return data
 
+    def _read_checkpoint(
+        self,
+        item_type: RepositoryItemType,
+        checkpoint_file: str,
+        header: dict[str, Any],
+    ) -> tuple[list[AttrDict], int, int]:
+        """Reads the pages stored in a checkpoint file.
+
+        :param checkpoint_file: the file to read
+        :param header: the expected header of the file; if the file has
+            a different header, it was written for a different fetch and
+            is ignored
+        :return: the items stored in the file, the number of the next
+            page to fetch, and the size of the valid part of the file
+        """
+
+        data: list[AttrDict] = []
+        next_page = 1
+        size = 0
+        with open(checkpoint_file, "r") as f:
+            for i, line in enumerate(f):
+                if not line.endswith("\n"):
+                    # Incomplete record
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if i == 0:
+                    if record != header:
+                        break
+                else:
+                    data.extend(
+                        [self._make_item(item_type, i) for i in record["items"]]
+                    )
+                    next_page = record["page"] + 1
+                size += len(line.encode("utf-8"))
+        return (data, next_page, size)
+
+    def _get_cache_file(self, item_type: RepositoryItemType) -> Optional[str]:
+        """Gets the file that is written last when the cached data of
+        the given type are refreshed, or None if there is no such file."""
+
+        if item_type in self._segmented_types:
+            manifest_file = self._get_manifest_file(item_type)
+            if os.path.exists(manifest_file):
+                return manifest_file
+        # Not segmented, or not yet segmented
+        return Compression.find_file(self._get_data_file(item_type))
+
+    def _get_segment_dir(self, item_type: RepositoryItemType) -> str:
+        return os.path.join(self._cachedir, item_type.name.lower())
+
+    def _get_manifest_file(self, item_type: RepositoryItemType) -> str:
+        return os.path.join(self._get_segment_dir(item_type), "manifest.json")
+
+    def _iter_cache(
+        self,
+        item_type: RepositoryItemType,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+    ) -> Iterator[AttrDict]:
+        """Iterates over the cached data of the given type.
+
+        If the data are segmented, segments that cannot contain any
+        item created between 'after' and 'before' are skipped; it is
+        up to the caller to filter the items from the other segments.
+        Items from the journal are merged into their segments.
+        """
+
+        manifest_file = self._get_manifest_file(item_type)
+        if item_type not in self._segmented_types or not os.path.exists(manifest_file):
+            data_file = Compression.find_file(self._get_data_file(item_type))
+            if data_file is not None:
+                yield from self._iter_data_file(item_type, data_file)
+            return
+
+        manifest = self._read_manifest(item_type)
+        bounds = {s["name"]: (s["min"], s["max"]) for s in manifest["segments"]}
+        files = self._get_segment_files(manifest)
+
+        # Journal items replace their copies in the segments
+        journal = {
+            self._get_item_key(item_type, i): i
+            for i in self._read_journal(item_type)[0]
+        }
+        journal_segments: dict[str, list[AttrDict]] = {}
+        for item in journal.values():
+            date = self._get_item_date(item_type, item)
+            journal_segments.setdefault(date[:7], []).append(item)
+            # Do not trust the manifest to account for the journal
+            low, high = bounds.get(date[:7], (date, date))
+            bounds[date[:7]] = (min(low, date), max(high, date))
+
+        segment_dir = self._get_segment_dir(item_type)
+        for name, (low, high) in sorted(bounds.items(), reverse=True):
+            if after is not None and high <= date2gh(after):
+                continue
+            if before is not None and low >= date2gh(before):
+                continue
+
+            segment: Iterable[AttrDict] = []
+            if name in files:
+                segment_file = os.path.join(segment_dir, files[name])
+                if os.path.exists(segment_file):
+                    segment = self._iter_data_file(item_type, segment_file)
+            if name not in journal_segments:
+                yield from segment
+                continue
+
+            yield from heapq.merge(
+                (i for i in segment if self._get_item_key(item_type, i) not in journal),
+                sorted(
+                    journal_segments[name],
+                    key=lambda i: self._get_item_date(item_type, i),
+                    reverse=True,
+                ),
+                key=lambda i: self._get_item_date(item_type, i),
+                reverse=True,
+            )
+
+    def _write_cache(
+        self,
+        item_type: RepositoryItemType,
+        data: list[AttrDict],
+        new_data: Optional[list[AttrDict]] = None,
+    ) -> None:
+        """Writes the cached data of the given type.
+
+        :param data: all the data to cache
+        :param new_data: the data that have been added to the cache
+            since it was last written; if set, those data are merely
+            appended to the journal, unless the journal has grown large
+            enough to warrant a compaction
+        """
+
+        if item_type not in self._segmented_types:
+            self._write_data_file(self._get_data_file(item_type), data)
+            return
+
+        segments: dict[str, list[AttrDict]] = {}
+        for item in data:
+            name = self._get_item_date(item_type, item)[:7]
+            segments.setdefault(name, []).append(item)
+
+        segment_dir = self._get_segment_dir(item_type)
+        makedirs(segment_dir, 0o755, True)
+        manifest_file = self._get_manifest_file(item_type)
+        journal_file = self._get_journal_file(item_type)
+        journal, journal_size = self._read_journal(item_type)
+        files: dict[str, str] = {}
+        if new_data is None or not os.path.exists(manifest_file):
+            # Full rewrite
+            changed = set(segments.keys())
+        elif len(journal) + len(new_data) > len(data) * _JOURNAL_MAX_RATIO:
+            # Compaction: fold the journal into the segments
+            changed = {
+                self._get_item_date(item_type, i)[:7] for i in journal + new_data
+            }
+            files = self._get_segment_files(self._read_manifest(item_type))
+        else:
+            changed = set()
+            files = self._get_segment_files(self._read_manifest(item_type))
+            with open(journal_file, "a") as f:
+                # Discard an incomplete record left by an interrupted write
+                f.truncate(journal_size)
+                for item in new_data:
+                    f.write(json.dumps(obj2dict(item)) + "\n")
+
+        for name in changed:
+            segment_file = os.path.join(segment_dir, name + ".json")
+            segment_file = self._write_data_file(segment_file, segments[name])
+            files[name] = os.path.basename(segment_file)
+        if len(changed) > 0 and os.path.exists(journal_file):
+            os.remove(journal_file)
+
+        manifest: dict[str, list[dict[str, Any]]] = {"segments": []}
+        for name, items in sorted(segments.items(), reverse=True):
+            dates = [self._get_item_date(item_type, i) for i in items]
+            manifest["segments"].append(
+                {
+                    "name": name,
+                    "min": min(dates),
+                    "max": max(dates),
+                    "count": len(items),
+                    # No file yet if all the items are in the journal
+                    "file": files.get(name),
+                }
+            )
+        with open(manifest_file + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=0)
+        os.replace(manifest_file + ".tmp", manifest_file)
+
+        # Remove obsolete files
+        for filename in os.listdir(segment_dir):
+            if filename.split(".")[0] not in segments:
+                if filename not in ["manifest.json", "journal.json"]:
+                    os.remove(os.path.join(segment_dir, filename))
+        while data_file := Compression.find_file(self._get_data_file(item_type)):
+            os.remove(data_file)
+
+    def _read_manifest(self, item_type: RepositoryItemType) -> dict[str, Any]:
+        with open(self._get_manifest_file(item_type), "r") as f:
+            return json.load(f)
+
+    def _get_segment_files(self, manifest: dict[str, Any]) -> dict[str, str]:
+        """Gets the name of the file of each segment in a manifest."""
+
+        # Manifests written before compression was supported do not
+        # record the file names
+        files = {
+            s["name"]: s.get("file", s["name"] + ".json") for s in manifest["segments"]
+        }
+        return {name: file for name, file in files.items() if file is not None}
+
+    def _read_journal(
+        self, item_type: RepositoryItemType
+    ) -> tuple[list[AttrDict], int]:
+        """Reads the journal of the given type of data.
+
+        :return: the items in the journal, and the size of the valid
+            part of the journal
+        """
+
+        items: list[AttrDict] = []
+        size = 0
+        journal_file = self._get_journal_file(item_type)
+        if not os.path.exists(journal_file):
+            return (items, size)
+
+        with open(journal_file, "r") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # Incomplete record
+                    break
+                items.append(self._make_item(item_type, json.loads(line)))
+                size += len(line.encode("utf-8"))
+        return (items, size)
+
+    def _get_journal_file(self, item_type: RepositoryItemType) -> str:
+        return os.path.join(self._get_segment_dir(item_type), "journal.json")
+
+    def _merge_data(
+        self,
+        item_type: RepositoryItemType,
+        data: list[AttrDict],
+        new_data: list[AttrDict],
+    ) -> list[AttrDict]:
+        """Merges new items into existing data.
+
+        Both lists must already be free of duplicates and in descending
+        chronological order. New copies of existing items replace them.
+        """
+
+        new_keys = {self._get_item_key(item_type, i) for i in new_data}
+        return list(
+            heapq.merge(
+                (i for i in data if self._get_item_key(item_type, i) not in new_keys),
+                new_data,
+                key=lambda i: self._get_item_date(item_type, i),
+                reverse=True,
+            )
+        )
+
     def _get_data_file(self, item_type: RepositoryItemType) -> str:
         filename = item_type.name.lower() + ".json"
         return os.path.join(self._cachedir, filename)
 
+    def _write_data_file(self, data_file: str, data: list[AttrDict]) -> str:
+        """Writes a data file, compressed with the current method.
+
+        :param data_file: the path to the file, without the extension
+            of the compression method
+        :param data: the items to write
+        :return: the path to the file that has been written
+        """
+
+        compressed_file = data_file + self._compression.extension
+        # The file is a normal JSON array, but with exactly one item per
+        # line so that it can also be read one item at a time
+        with self._compression.open(compressed_file + ".tmp", "wt") as f:
+            f.write("[\n")
+            for i, item in enumerate(data):
+                if i > 0:
+                    f.write(",\n")
+                f.write(json.dumps(obj2dict(item)))
+            f.write("\n]\n")
+        os.replace(compressed_file + ".tmp", compressed_file)
+
+        # Remove any copy written with another method
+        for c in Compression.all():
+            if c != self._compression and os.path.exists(data_file + c.extension):
+                os.remove(data_file + c.extension)
+        return compressed_file
+
+    def _iter_data_file(
+        self, item_type: RepositoryItemType, data_file: str
+    ) -> Iterator[AttrDict]:
+        compression = Compression.from_filename(data_file)
+        with compression.open(data_file, "rt") as f:
+            f.readline()
+            line = f.readline()
+            if line.strip() != "{":
+                while line and line.strip() != "]":
+                    item = json.loads(line.rstrip().rstrip(","))
+                    yield self._make_item(item_type, item)
+                    line = f.readline()
+                return
+
+        # Old format (one item spanning several lines), we can only
+        # read the file as a whole
+        with compression.open(data_file, "rt") as f:
+            yield from [self._make_item(item_type, i) for i in json.load(f)]
+
     def _get_last_item_date(
         self, item_type: RepositoryItemType, data: list[AttrDict]
     ) -> Optional[datetime]:
         if item_type == RepositoryItemType.ISSUES:
-            # Force full refresh, so that we get updated status for
-            # old issues
-            return None
+            # Get all issues updated since the last known update, so
+            # that we get updated status for old issues
+            return max(gh2date(i.updated_at) for i in data)
         elif item_type in [
             RepositoryItemType.LABELS,
             RepositoryItemType.TEAMS,
@@ -407,11 +1781,11 @@ class FileRepositoryProvider(RepositoryProvider):
             # Always fetch everything for those
             return None
         elif item_type == RepositoryItemType.COMMITS:
-            # Only get new commits
-            return datetime.strptime(data[-1].commit.author.date, GITHUB_DATE_FORMAT)
+            # Only get new commits (data are in descending order)
+            return gh2date(data[0].commit.author.date)
         else:
-            # Only get new other items
-            return datetime.strptime(data[-1].created_at, GITHUB_DATE_FORMAT)
+            # Only get new other items (data are in descending order)
+            return gh2date(data[0].created_at)
 
     def _purge_duplicates(
         self, data: list[AttrDict], item_type: RepositoryItemType
@@ -426,9 +1800,7 @@ class FileRepositoryProvider(RepositoryProvider):
             return sorted(
                 {c.sha: c for c in data}.values(),
                 reverse=True,
-                key=lambda c: datetime.strptime(
-                    c.commit.author.date, GITHUB_DATE_FORMAT
-                ),
+                key=lambda c: self._get_item_timestamp(item_type, c),
             )
         elif item_type == RepositoryItemType.LABELS:
             # Identify duplicates by label ID
@@ -445,19 +1817,103 @@ class FileRepositoryProvider(RepositoryProvider):
             return sorted(
                 {i.id: i for i in data}.values(),
                 reverse=True,
-                key=lambda i: datetime.strptime(i.created_at, GITHUB_DATE_FORMAT),
+                key=lambda i: self._get_item_timestamp(item_type, i),
             )
 
 
+class _Window(object):
+    """A time window over which some items have been fetched."""
+
+    def __init__(self, after: Optional[datetime], before: Optional[datetime]):
+        self.after = after
+        self.before = before
+
+    def is_unbounded(self) -> bool:
+        return self.after is None and self.before is None
+
+    def covers(self, after: Optional[datetime], before: Optional[datetime]) -> bool:
+        """Indicates whether this window contains the specified one."""
+
+        return (self.after is None or (after is not None and after >= self.after)) and (
+            self.before is None or (before is not None and before <= self.before)
+        )
+
+
+class ItemIndex(object):
+    """Inverted indexes over a list of records.
+
+    The indexes map the identifier of a user (in the symbol table of
+    the repository), the identifier of a label, or the type of an
+    event, to the positions in the list of the records created by that
+    user, carrying that label, or of that event type, in ascending
+    order. Each index is only built the first time it is needed.
+    """
+
+    def __init__(self, items: list[Any]):
+        """Creates a new instance.
+
+        :param items: the records to index
+        """
+
+        self.items = items
+        self._users: Optional[dict[Optional[int], list[int]]] = None
+        self._labels: Optional[dict[int, list[int]]] = None
+        self._events: Optional[dict[Optional[str], list[int]]] = None
+
+    def by_user(self, user_id: int) -> list[int]:
+        """Gets the positions of the records created by a user."""
+
+        if self._users is None:
+            users: dict[Optional[int], list[int]] = {}
+            for n, item in enumerate(self.items):
+                users.setdefault(item.user_id, []).append(n)
+            self._users = users
+        return self._users.get(user_id, [])
+
+    def by_label(self, label_id: int) -> list[int]:
+        """Gets the positions of the records carrying a label."""
+
+        if self._labels is None:
+            labels: dict[int, list[int]] = {}
+            for n, item in enumerate(self.items):
+                mask = item.label_mask
+                label = 0
+                while mask:
+                    if mask & 1:
+                        labels.setdefault(label, []).append(n)
+                    mask >>= 1
+                    label += 1
+            self._labels = labels
+        return self._labels.get(label_id, [])
+
+    def by_event(self, event: str) -> list[int]:
+        """Gets the positions of the events of a given type."""
+
+        if self._events is None:
+            events: dict[Optional[str], list[int]] = {}
+            for n, item in enumerate(self.items):
+                events.setdefault(item.get("event"), []).append(n)
+            self._events = events
+        return self._events.get(event, [])
+
+
 class MemoryRepositoryProvider(RepositoryProvider):
-    """In-memory cache for data from a GitHub repository."""
+    """In-memory cache for data from a GitHub repository.
 
-    _wrappers = {
-        RepositoryItemType.ISSUES: IssueItem,
-        RepositoryItemType.COMMITS: CommitItem,
-        RepositoryItemType.COMMENTS: RepositoryItem,
-        RepositoryItemType.EVENTS: EventItem,
-        RepositoryItemType.RELEASES: ReleaseItem,
+    Items of the types that have a creation time are converted into
+    compact records (see ItemRecord) when they are obtained from the
+    backend. Inverted indexes (see ItemIndex) over the records kept in
+    memory are built when needed, to quickly find the records of a
+    given user, with a given label, or of a given event type.
+    """
+
+    # The classes of the records of each type
+    _records = {
+        RepositoryItemType.ISSUES: IssueRecord,
+        RepositoryItemType.COMMITS: CommitRecord,
+        RepositoryItemType.COMMENTS: ItemRecord,
+        RepositoryItemType.EVENTS: EventRecord,
+        RepositoryItemType.RELEASES: ReleaseRecord,
     }
 
     def __init__(self, backend: RepositoryProvider):
@@ -468,16 +1924,151 @@ class MemoryRepositoryProvider(RepositoryProvider):
         """
 
         self._backend = backend
+        self.symbols = RepositorySymbols()
         self._data: dict[RepositoryItemType, list[Any]] = {}
+        # Items created within a time window, for the types of data
+        # that have only been prefetched for that window
+        self._windows: dict[RepositoryItemType, tuple[_Window, list[Any]]] = {}
+        self._indexes: dict[RepositoryItemType, ItemIndex] = {}
 
     def get_data(
         self, item_type: RepositoryItemType, since: Optional[datetime] = None
     ) -> list[Any]:
         if item_type not in self._data:
             items = self._backend.get_data(item_type, since)
-            wrapper = self._wrappers.get(item_type, None)
-            if wrapper is not None:
-                for item in items:
-                    item.__class__ = wrapper
+            if (record := self._records.get(item_type, None)) is not None:
+                items = [record(item, self.symbols) for item in items]
+            self._register(item_type, items)
             self._data[item_type] = items
         return self._data[item_type]
+
+    def iter_data(
+        self, item_type: RepositoryItemType, since: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        if item_type in self._data:
+            yield from self._data[item_type]
+            return
+
+        # Items that are only iterated over are not kept in memory
+        record = self._records.get(item_type, None)
+        for item in self._backend.iter_data(item_type, since):
+            yield record(item, self.symbols) if record is not None else item
+
+    def find_data(
+        self,
+        item_type: RepositoryItemType,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        user: Optional[str] = None,
+        event: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> Iterator[Any]:
+        if (items := self._get_items(item_type, after, before)) is not None:
+            if item_type in self._records:
+                index = self._get_index(item_type, items)
+                positions = None
+                if user is not None:
+                    positions = index.by_user(self.symbols.users.intern(user))
+                elif event is not None:
+                    positions = index.by_event(event)
+                elif label is not None:
+                    positions = index.by_label(self.symbols.labels.intern(label))
+                if positions is not None:
+                    items = [items[n] for n in positions]
+            yield from self._match_items(
+                items, item_type, after, before, user, event, label
+            )
+            return
+
+        # Let the backend do the search, in case it can do it better
+        record = self._records.get(item_type, None)
+        for item in self._backend.find_data(
+            item_type, after, before, user, event, label
+        ):
+            yield record(item, self.symbols) if record is not None else item
+
+    def prefetch(
+        self,
+        item_types: list[RepositoryItemType],
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+    ) -> None:
+        window = _Window(after, before)
+        missing = [
+            t
+            for t in set(item_types)
+            if t not in self._data
+            and not (t in self._windows and self._windows[t][0].covers(after, before))
+        ]
+        if len(missing) < 2:
+            for item_type in missing:
+                self._prefetch_one(item_type, window)
+            return
+
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            # Consume the results so that any exception gets propagated
+            for _ in executor.map(self._prefetch_one, missing, [window] * len(missing)):
+                pass
+
+    def _prefetch_one(self, item_type: RepositoryItemType, window: _Window) -> None:
+        if window.is_unbounded() or item_type not in self._wrappers:
+            self.get_data(item_type)
+        else:
+            items = list(self.find_data(item_type, window.after, window.before))
+            self._register(item_type, items)
+            self._windows[item_type] = (window, items)
+
+    def get_index(
+        self,
+        item_type: RepositoryItemType,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+    ) -> ItemIndex:
+        """Gets inverted indexes over the records of a given type.
+
+        :param item_type: the type of records to index; must be one of
+            the types converted into records
+        :param after: if set, the indexed records must include all the
+            records created after that time
+        :param before: if set, the indexed records must include all the
+            records created before that time
+        :return: the indexes; they may cover more records than those
+            created in the specified time window
+        """
+
+        if after is None and before is None:
+            self.get_data(item_type)
+        if (items := self._get_items(item_type, after, before)) is not None:
+            return self._get_index(item_type, items)
+        return ItemIndex(list(self.find_data(item_type, after, before)))
+
+    def _get_items(
+        self,
+        item_type: RepositoryItemType,
+        after: Optional[datetime],
+        before: Optional[datetime],
+    ) -> Optional[list[Any]]:
+        """Gets the items in memory that include all the items created
+        in a given time window, if any."""
+
+        if item_type in self._data:
+            return self._data[item_type]
+        if item_type in self._windows:
+            window, items = self._windows[item_type]
+            if window.covers(after, before):
+                return items
+        return None
+
+    def _get_index(self, item_type: RepositoryItemType, items: list[Any]) -> ItemIndex:
+        index = self._indexes.get(item_type)
+        if index is None or index.items is not items:
+            index = self._indexes[item_type] = ItemIndex(items)
+        return index
+
+    def _register(self, item_type: RepositoryItemType, items: list[Any]) -> None:
+        """Makes the issues kept in memory the ones that events refer to."""
+
+        if item_type == RepositoryItemType.ISSUES:
+            self.symbols.issues.update((issue.number, issue) for issue in items)
+            # The labels of the events may have changed
+            self._indexes.pop(RepositoryItemType.EVENTS, None)
@@ -14,12 +14,21 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Optional
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any, Optional
 
 from fastcore.basics import AttrDict  # type: ignore
 from ghapi.core import GhApi  # type: ignore
 
-from .providers import IssueItem, MemoryRepositoryProvider, RepositoryProvider
+from .providers import (
+    IssueRecord,
+    ItemIndex,
+    MemoryRepositoryProvider,
+    RepositoryItemType,
+    RepositoryProvider,
+)
+from .symbols import RepositorySymbols
 
 
 class Repository(object):
@@ -37,20 +46,82 @@ class Repository(object):
         self._committers = None
         self._commenters = None
 
+    def prefetch(
+        self,
+        item_types: list[RepositoryItemType],
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+    ) -> None:
+        """Loads concurrently all the data of the specified types.
+
+        Commands that know in advance which types of data they will
+        need should call this method first, so that the data are loaded
+        (from the cache or from GitHub) all at once instead of one type
+        after the other.
+
+        If 'after' and/or 'before' are set, only the items created in
+        that time window are loaded, for the types of data that have a
+        creation time; such items should then be obtained with the
+        find_items() method.
+        """
+
+        self._provider.prefetch(item_types, after, before)
+
+    @property
+    def symbols(self) -> RepositorySymbols:
+        """The symbol tables used to intern the user logins and label
+        names found in the items."""
+
+        return self._provider.symbols
+
+    def find_items(
+        self,
+        item_type: RepositoryItemType,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+    ) -> list[Any]:
+        """Gets the items of the specified type created in a given
+        time window."""
+
+        return list(self._provider.find_data(item_type, after, before))
+
+    def get_index(
+        self,
+        item_type: RepositoryItemType,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+    ) -> ItemIndex:
+        """Gets inverted indexes over the items of the specified type,
+        including at least all the items created in a given time
+        window."""
+
+        return self._provider.get_index(item_type, after, before)
+
     @property
-    def issues(self) -> list[IssueItem]:
+    def issues(self) -> list[IssueRecord]:
         return [i for i in self._provider.issues if i.closed_at is None]
 
+    def iter_issues(self) -> Iterator[IssueRecord]:
+        """Iterates over open issues.
+
+        Contrary to the 'issues' property, this does not require all
+        the issues to be loaded in memory.
+        """
+
+        for i in self._provider.iter_data(RepositoryItemType.ISSUES):
+            if i.closed_at is None and not hasattr(i, "pull_request"):
+                yield i
+
     @property
-    def all_issues(self) -> list[IssueItem]:
+    def all_issues(self) -> list[IssueRecord]:
         return self._provider.issues
 
     @property
-    def pull_requests(self) -> list[IssueItem]:
+    def pull_requests(self) -> list[IssueRecord]:
         return [i for i in self._provider.pull_requests if i.closed_at is None]
 
     @property
-    def all_pull_requests(self) -> list[IssueItem]:
+    def all_pull_requests(self) -> list[IssueRecord]:
         return self._provider.pull_requests
 
     @property
@@ -135,7 +206,7 @@ class Repository(object):
 
     def close_issue(
         self,
-        issue: IssueItem,
+        issue: IssueRecord,
         label: Optional[str] = None,
         comment: Optional[str] = None,
     ) -> None:
@@ -0,0 +1,301 @@
+# grainyhead - Helper tools for GitHub
+# Copyright © 2026 Damien Goutte-Gattat
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os.path
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from datetime import datetime
+from os import makedirs
+from typing import Any, Optional
+
+from fastcore.basics import AttrDict  # type: ignore
+from fastcore.xtras import obj2dict  # type: ignore
+
+from .caching import CachePolicy
+from .providers import RepositoryItemType, RepositoryProvider, date2gh, gh2date
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    type INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    user TEXT,
+    event TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (type, key)
+);
+CREATE INDEX IF NOT EXISTS items_by_date ON items (type, created_at);
+CREATE INDEX IF NOT EXISTS items_by_user ON items (type, user, created_at);
+CREATE INDEX IF NOT EXISTS items_by_event ON items (type, event, created_at);
+
+CREATE TABLE IF NOT EXISTS labels (
+    type INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    label TEXT NOT NULL,
+    PRIMARY KEY (type, key, label)
+);
+CREATE INDEX IF NOT EXISTS labels_by_label ON labels (type, label);
+
+CREATE TABLE IF NOT EXISTS refreshes (
+    type INTEGER PRIMARY KEY,
+    refreshed REAL,
+    since TEXT,
+    next_page INTEGER
+);
+"""
+
+
+class SqliteRepositoryProvider(RepositoryProvider):
+    """Provides access to cached data from a GitHub repository, stored
+    in a SQLite database.
+
+    This is an alternative to FileRepositoryProvider, with the same
+    refresh behaviour. Items are stored in a table keyed by item type
+    and identifier, with indexes on creation time, author, event type,
+    and labels, so that the find_data() method can retrieve the items
+    matching some criteria without having to load all the items.
+
+    The progress of a refresh is recorded after each page of results,
+    so that an interrupted refresh can be resumed from the next page.
+    """
+
+    def __init__(self, filename: str, backend: RepositoryProvider, policy: CachePolicy):
+        """Creates a new instance.
+
+        :param filename: the path to the database file
+        :param backend: the RepositoryProvider object from which to
+            fetch the data when the cache needs to be refreshed
+        :param policy: the cache policy
+        """
+
+        self._filename = filename
+        self._backend = backend
+        self._policy = policy
+        self._refreshed: set[RepositoryItemType] = set()
+        # SQLite connections cannot be shared between threads
+        self._local = threading.local()
+
+    def get_data(
+        self, item_type: RepositoryItemType, since: Optional[datetime] = None
+    ) -> list[AttrDict]:
+        if self._policy == CachePolicy.DISABLED:
+            return self._backend.get_data(item_type, since)
+
+        return list(self.iter_data(item_type, since))
+
+    def iter_data(
+        self, item_type: RepositoryItemType, since: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        if self._policy == CachePolicy.DISABLED:
+            yield from self._backend.iter_data(item_type, since)
+            return
+
+        self._refresh(item_type)
+        yield from self._select(item_type, [], [])
+
+    def find_data(
+        self,
+        item_type: RepositoryItemType,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        user: Optional[str] = None,
+        event: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> Iterator[Any]:
+        if self._policy == CachePolicy.DISABLED:
+            yield from RepositoryProvider.find_data(
+                self, item_type, after, before, user, event, label
+            )
+            return
+
+        self._refresh(item_type)
+        conditions = []
+        parameters: list[Any] = []
+        if after is not None:
+            conditions.append("created_at > ?")
+            parameters.append(date2gh(after))
+        if before is not None:
+            conditions.append("created_at < ?")
+            parameters.append(date2gh(before))
+        if user is not None:
+            conditions.append("user = ?")
+            parameters.append(user)
+        if event is not None:
+            conditions.append("event = ?")
+            parameters.append(event)
+        if label is not None:
+            conditions.append(
+                "key IN (SELECT key FROM labels WHERE type = ? AND label = ?)"
+            )
+            parameters.extend([item_type.value, label])
+        yield from self._select(item_type, conditions, parameters)
+
+    def _select(
+        self, item_type: RepositoryItemType, conditions: list[str], parameters: list
+    ) -> Iterator[AttrDict]:
+        query = "SELECT data FROM items WHERE " + " AND ".join(
+            ["type = ?"] + conditions
+        )
+        # Same order as the one used by FileRepositoryProvider
+        query += " ORDER BY created_at DESC, rowid"
+        for row in self._get_connection().execute(
+            query, [item_type.value, *parameters]
+        ):
+            yield self._make_item(item_type, json.loads(row[0]))
+
+    def _refresh(self, item_type: RepositoryItemType) -> None:
+        """Refreshes the cached data of the given type, if needed."""
+
+        if item_type in self._refreshed:
+            return
+
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT refreshed, since, next_page FROM refreshes WHERE type = ?",
+            (item_type.value,),
+        ).fetchone()
+
+        since = None
+        first_page = 1
+        if self._policy == CachePolicy.RESET or row is None:
+            pass
+        elif row[2] is not None:
+            # Resume an interrupted refresh
+            since = gh2date(row[1]) if row[1] else None
+            first_page = row[2]
+        elif not self._policy.refresh(row[0]):
+            self._refreshed.add(item_type)
+            return
+        else:
+            since = self._get_last_item_date(item_type)
+
+        with conn:
+            if first_page == 1 and since is None:
+                self._delete_items(conn, item_type)
+            conn.execute(
+                "INSERT OR REPLACE INTO refreshes (type, refreshed, since, next_page) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    item_type.value,
+                    row[0] if row else None,
+                    date2gh(since) if since else None,
+                    first_page,
+                ),
+            )
+
+        for n, page in self._backend.iter_pages(item_type, since, first_page):
+            with conn:
+                self._store_items(conn, item_type, page)
+                conn.execute(
+                    "UPDATE refreshes SET next_page = ? WHERE type = ?",
+                    (n + 1, item_type.value),
+                )
+
+        with conn:
+            conn.execute(
+                "UPDATE refreshes SET refreshed = ?, since = NULL, next_page = NULL "
+                "WHERE type = ?",
+                (time.time(), item_type.value),
+            )
+        self._refreshed.add(item_type)
+
+    def _get_last_item_date(self, item_type: RepositoryItemType) -> Optional[datetime]:
+        if item_type in [
+            RepositoryItemType.LABELS,
+            RepositoryItemType.TEAMS,
+            RepositoryItemType.COMMITTERS,
+        ]:
+            # Always fetch everything for those
+            return None
+
+        # Get all issues updated since the last known update (so that
+        # we get updated status for old issues), or new other items
+        column = (
+            "updated_at" if item_type == RepositoryItemType.ISSUES else "created_at"
+        )
+        row = (
+            self._get_connection()
+            .execute(
+                f"SELECT MAX({column}) FROM items WHERE type = ?", (item_type.value,)
+            )
+            .fetchone()
+        )
+        return gh2date(row[0]) if row[0] else None
+
+    def _delete_items(
+        self, conn: sqlite3.Connection, item_type: RepositoryItemType
+    ) -> None:
+        conn.execute("DELETE FROM items WHERE type = ?", (item_type.value,))
+        conn.execute("DELETE FROM labels WHERE type = ?", (item_type.value,))
+
+    def _store_items(
+        self, conn: sqlite3.Connection, item_type: RepositoryItemType, items: list
+    ) -> None:
+        wrapper = self._wrappers.get(item_type, None)
+        rows = []
+        labels = []
+        for item in items:
+            key = self._get_item_key(item_type, item)
+            if wrapper is None:
+                rows.append((key, None, None, None, None, obj2dict(item)))
+                continue
+
+            item.__class__ = wrapper
+            if item_type == RepositoryItemType.COMMITS:
+                created_at = item.commit.author.date
+            else:
+                created_at = item.created_at
+            rows.append(
+                (
+                    key,
+                    created_at,
+                    item.get("updated_at"),
+                    item.user_name,
+                    item.get("event"),
+                    obj2dict(item),
+                )
+            )
+            labels.extend([(key, label) for label in item.label_strings])
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO items "
+            "(type, key, created_at, updated_at, user, event, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(item_type.value, *row[:5], json.dumps(row[5])) for row in rows],
+        )
+        conn.executemany(
+            "DELETE FROM labels WHERE type = ? AND key = ?",
+            [(item_type.value, row[0]) for row in rows],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO labels (type, key, label) VALUES (?, ?, ?)",
+            [(item_type.value, *label) for label in labels],
+        )
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            makedirs(os.path.dirname(self._filename), 0o755, True)
+            # Concurrent refreshes may have to wait for each other
+            conn = sqlite3.connect(self._filename, timeout=60)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
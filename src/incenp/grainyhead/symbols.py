@@ -0,0 +1,104 @@
+# grainyhead - Helper tools for GitHub
+# Copyright © 2026 Damien Goutte-Gattat
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+
+class SymbolTable(object):
+    """Maps strings to small integer identifiers.
+
+    Each distinct string gets the next available identifier the first
+    time it is interned, and keeps it for the lifetime of the table.
+    All callers interning the same string get the same string object
+    back from the name() method, so that it is stored only once.
+
+    Identifiers can also be combined into bitmasks, to represent a set
+    of strings as a single integer.
+
+    Tables may be filled from several threads at once (e.g. when several
+    types of items are loaded concurrently).
+    """
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._names: list[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, name: str) -> int:
+        """Gets the identifier of a string, assigning a new one if the
+        string has never been seen before."""
+
+        if (n := self._ids.get(name)) is None:
+            with self._lock:
+                if (n := self._ids.get(name)) is None:
+                    self._names.append(name)
+                    n = self._ids[name] = len(self._names) - 1
+        return n
+
+    def name(self, n: int) -> str:
+        """Gets the string with the specified identifier."""
+
+        return self._names[n]
+
+    def canonical(self, name: str) -> str:
+        """Gets the single shared copy of a string."""
+
+        return self._names[self.intern(name)]
+
+    def get_mask(self, names: Iterable[str]) -> int:
+        """Gets the bitmask representing a set of strings."""
+
+        mask = 0
+        for name in names:
+            mask |= 1 << self.intern(name)
+        return mask
+
+    def get_names(self, mask: int) -> list[str]:
+        """Gets the strings in the set represented by a bitmask."""
+
+        names = []
+        n = 0
+        while mask:
+            if mask & 1:
+                names.append(self._names[n])
+            mask >>= 1
+            n += 1
+        return names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+class RepositorySymbols(object):
+    """The symbol tables of a repository.
+
+    The 'users' table interns user logins, and the 'labels' table
+    interns label names.
+
+    The symbols also hold the single shared copies of the objects that
+    are nested in many items: users and labels (indexed by their
+    identifiers in the corresponding tables), and issues (indexed by
+    their numbers).
+    """
+
+    def __init__(self):
+        self.users = SymbolTable()
+        self.labels = SymbolTable()
+        self.user_records: dict[int, Any] = {}
+        self.label_records: dict[int, Any] = {}
+        self.issues: dict[int, Any] = {}
@@ -0,0 +1,66 @@
+# grainyhead - Helper tools for GitHub
+# Copyright © 2026 Damien Goutte-Gattat
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from incenp.grainyhead.graphql import GraphQLRepositoryProvider
+from incenp.grainyhead.providers import RepositoryItemType
+
+
+class _FakeApi(object):
+    """Answers all GraphQL queries with the same commit history."""
+
+    def __init__(self, commits):
+        self._commits = commits
+
+    def __call__(self, path, verb, data):
+        history = {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "nodes": self._commits,
+        }
+        target = {"history": history}
+        return {"data": {"repository": {"defaultBranchRef": {"target": target}}}}
+
+
+class TestGraphQLRepositoryProvider(unittest.TestCase):
+    def test_commit_dates_in_utc(self):
+        api = _FakeApi(
+            [
+                {
+                    "oid": "abc",
+                    "author": {
+                        "name": "Alice",
+                        "date": "2024-01-31T23:30:00+02:00",
+                        "user": {"login": "alice"},
+                    },
+                },
+                {
+                    "oid": "def",
+                    "author": {
+                        "name": "Bob",
+                        "date": "2024-01-31T20:00:00-05:00",
+                        "user": None,
+                    },
+                },
+            ]
+        )
+        provider = GraphQLRepositoryProvider(api, "o", "r")
+        commits = provider.get_data(RepositoryItemType.COMMITS)
+
+        self.assertEqual(
+            ["2024-01-31T21:30:00Z", "2024-02-01T01:00:00Z"],
+            [c.commit.author.date for c in commits],
+        )
@@ -0,0 +1,96 @@
+# grainyhead - Helper tools for GitHub
+# Copyright © 2026 Damien Goutte-Gattat
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import os.path
+import tempfile
+import unittest
+from types import SimpleNamespace
+from urllib.error import HTTPError
+
+from incenp.grainyhead.caching import Compression, PageCache
+from incenp.grainyhead.providers import OnlineRepositoryProvider, RepositoryItemType
+
+
+class _FakeCall(object):
+    """Answers with a single page of labels the first time, then with
+    a 304."""
+
+    def __init__(self, api, path):
+        self.path = path
+        self._api = api
+        self.headers = []
+
+    def __call__(self, per_page, page, headers={}, **kwargs):
+        if page > 1:
+            self._api.recv_hdrs = {}
+            return []
+        self.headers.append(headers)
+        if headers:
+            raise HTTPError(self.path, 304, "Not Modified", {}, None)  # type: ignore
+        self._api.recv_hdrs = {"ETag": '"abc"'}
+        return [
+            {
+                "id": 1,
+                "name": "bug",
+                "color": "ff0000",
+                "description": None,
+                "url": "https://api.github.com/repos/o/r/labels/bug",
+            }
+        ]
+
+
+class _FakeApi(object):
+    def __init__(self):
+        self.recv_hdrs = {}
+        call = _FakeCall(self, "/repos/o/r/labels")
+        self.issues = SimpleNamespace(
+            list_for_repo=None,
+            list_comments_for_repo=None,
+            list_labels_for_repo=call,
+            list_events_for_repo=None,
+        )
+        self.repos = SimpleNamespace(
+            list_contributors=None,
+            list_commits=None,
+            list_releases=None,
+            list_collaborators=None,
+        )
+        self.teams = SimpleNamespace(list=None, list_members_in_org=None)
+
+
+class TestOnlineRepositoryProvider(unittest.TestCase):
+    def test_page_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            api = _FakeApi()
+            page_cache = PageCache(directory, Compression.GZIP)
+            provider = OnlineRepositoryProvider(api, page_cache=page_cache)  # type: ignore
+
+            labels = provider.get_data(RepositoryItemType.LABELS)
+            self.assertEqual(["bug"], [label.name for label in labels])
+            self.assertNotIn("url", labels[0])
+
+            (filename,) = os.listdir(directory)
+            self.assertTrue(filename.endswith(".json.gz"))
+            key = filename.removesuffix(".json.gz")
+            stored = page_cache.get(key)
+            self.assertIsNotNone(stored)
+            self.assertNotIn("url", stored["items"][0])  # type: ignore
+
+            labels = provider.get_data(RepositoryItemType.LABELS)
+            call = api.issues.list_labels_for_repo
+            self.assertEqual({"If-None-Match": '"abc"'}, call.headers[-1])
+            self.assertEqual(["bug"], [label.name for label in labels])